@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request cost of the HTTP metrics middleware.
+
+Builds a minimal FastAPI app with one /bookings/{booking_id} route and calls
+it directly over ASGI (no sockets, no HTTP client), in three variants:
+
+    bare        no metrics middleware
+    http        the previous @app.middleware("http") implementation,
+                labelled by raw path
+    asgi        the pure-ASGI MetricsMiddleware both services now use,
+                labelled by route template
+
+Instruments record into an in-memory OpenTelemetry SDK reader, so the cost
+of recording is included. For each variant it reports the best mean
+microseconds per request over --rounds, the overhead over the bare app,
+and how many request-duration series --distinct-ids different booking IDs
+produced.
+
+Usage:
+    python benchmarks/middleware_overhead.py --requests 20000 --distinct-ids 1000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+VARIANTS = ("bare", "http", "asgi")
+
+
+def make_instruments():
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("middleware-benchmark")
+    histogram = meter.create_histogram("http_request_duration_seconds", unit="s")
+    counter = meter.create_counter("http_requests_total", unit="1")
+    return reader, histogram, counter
+
+
+def series_count(reader) -> int:
+    data = reader.get_metrics_data()
+    if data is None:
+        return 0
+    for resource_metrics in data.resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                if metric.name == "http_request_duration_seconds":
+                    return len(metric.data.data_points)
+    return 0
+
+
+def build_app(variant: str):
+    from fastapi import FastAPI, Request, Response
+
+    from app.middleware import MetricsMiddleware
+
+    app = FastAPI()
+    reader, histogram, counter = make_instruments()
+
+    @app.get("/bookings/{booking_id}")
+    async def get_booking(booking_id: str):
+        return {"booking_id": booking_id}
+
+    if variant == "http":
+
+        @app.middleware("http")
+        async def metrics_middleware(request: Request, call_next):
+            labels = {
+                "service": "benchmark",
+                "method": request.method,
+                "path": request.url.path,
+            }
+            start_time = time.time()
+            try:
+                response: Response = await call_next(request)
+                duration = time.time() - start_time
+                histogram.record(duration, labels)
+                counter.add(1, {**labels, "status_code": str(response.status_code)})
+                return response
+            except Exception:
+                duration = time.time() - start_time
+                histogram.record(duration, labels)
+                counter.add(1, {**labels, "status_code": "500"})
+                raise
+
+    elif variant == "asgi":
+        app.add_middleware(
+            MetricsMiddleware,
+            service="benchmark",
+            duration_histogram=histogram,
+            request_counter=counter,
+        )
+    return app, reader
+
+
+async def drive(app, requests: int, booking_ids: list[str]) -> float:
+    """Call ``app`` ``requests`` times; return mean microseconds per request."""
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter_ns()
+    for i in range(requests):
+        path = f"/bookings/{booking_ids[i % len(booking_ids)]}"
+        delivered = False
+        disconnected = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a client that stays connected until the response is done
+            return await disconnected
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"benchmark")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        await app(scope, receive, send)
+        disconnected.cancel()
+    return (time.perf_counter_ns() - start) / requests / 1000
+
+
+async def run(requests: int, distinct_ids: int, rounds: int) -> None:
+    booking_ids = [f"B{i:06d}" for i in range(distinct_ids)]
+    results = {}
+    for variant in VARIANTS:
+        app, reader = build_app(variant)
+        await drive(app, min(requests, 1000), booking_ids)  # warm up
+        best = min([await drive(app, requests, booking_ids) for _ in range(rounds)])
+        results[variant] = (best, series_count(reader))
+
+    bare = results["bare"][0]
+    print(f"{'variant':<8}{'us/request':>12}{'overhead':>12}{'series':>9}")
+    for variant, (us, series) in results.items():
+        overhead = "-" if variant == "bare" else f"{us - bare:+.1f} us"
+        print(f"{variant:<8}{us:>12.1f}{overhead:>12}{series:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--distinct-ids", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    # MetricsMiddleware is identical in both services
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "booking_service"))
+    asyncio.run(run(args.requests, args.distinct_ids, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CPU cost of tracing per request, always-on versus sampled.
+
+Calls a minimal FastAPI app shaped like the booking service directly over
+ASGI (no sockets, no database). POST /bookings/ opens the
+create_booking stage spans, and --failure-rate of those requests are
+rejected with 400. The request mix comes from --mix. Three variants are
+measured:
+
+    none        no OpenTelemetry instrumentation, Sentry disabled
+    always_on   the previous setup: every request traced by OTel and Sentry
+    sampled     the sampler, tail-keep processor and Sentry hooks from
+                app/sampling.py, with rates from the booking service's
+                settings (TRACE_* environment variables apply)
+
+OTel spans are OTLP-encoded and discarded, and Sentry envelopes are
+serialized and discarded. Export CPU is counted, network I/O is not. For
+each variant the script reports process CPU microseconds per request,
+spans exported, Sentry transactions sent, and the CPU cores tracing takes
+at --rps over the untraced app.
+
+Usage:
+    python benchmarks/trace_sampling.py --requests 20000 --rps 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+VARIANTS = ("none", "always_on", "sampled")
+DEFAULT_MIX = (
+    "GET /bookings/{booking_id}=50,GET /bookings/=25,POST /bookings/=20,GET /=5"
+)
+STAGES = (
+    "idempotency_claim",
+    "validate",
+    "inventory_fetch",
+    "parse_inventory",
+    "hotel_name_fetch",
+    "allocate_id",
+    "insert",
+    "refresh",
+    "serialize",
+    "idempotency_save",
+    "commit",
+)
+SENTRY_DSN = "https://public@sentry.invalid/1"
+
+
+def parse_mix(mix: str) -> list[tuple[str, str]]:
+    """Expand ``"METHOD /route=weight,..."`` into a repeating request cycle."""
+    cycle = []
+    for entry in mix.split(","):
+        route, _, weight = entry.strip().rpartition("=")
+        method, _, template = route.partition(" ")
+        cycle += [(method, template.replace("{booking_id}", "B000042"))] * int(weight)
+    return cycle
+
+
+class OTLPEncodingExporter:
+    """Encodes spans as the OTLP exporter would, then discards them."""
+
+    def __init__(self):
+        self.spans = 0
+
+    def export(self, spans):
+        from opentelemetry.exporter.otlp.proto.common.trace_encoder import (
+            encode_spans,
+        )
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        encode_spans(spans).SerializeToString()
+        self.spans += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def make_transport():
+    from sentry_sdk.transport import Transport
+
+    class DiscardTransport(Transport):
+        transactions = 0
+
+        def capture_envelope(self, envelope):
+            envelope.serialize()
+            if any(item.type == "transaction" for item in envelope.items):
+                DiscardTransport.transactions += 1
+
+    return DiscardTransport
+
+
+def build_app(variant: str, failure_rate: float):
+    import sentry_sdk
+    from fastapi import FastAPI, HTTPException
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+    from sentry_sdk.integrations.starlette import StarletteIntegration
+
+    from app.config import settings
+    from app.sampling import (
+        RouteRates,
+        SentrySampler,
+        TailKeepSpanProcessor,
+        make_sampler,
+    )
+
+    app = FastAPI()
+    exporter = OTLPEncodingExporter()
+    transport = make_transport()
+    provider = None
+    sentry_options = {}
+
+    if variant == "sampled":
+        rates = RouteRates(
+            settings.trace_sample_rate,
+            settings.trace_sample_route_rates,
+            settings.trace_keep_routes,
+        )
+        provider = TracerProvider(sampler=make_sampler(rates))
+        processor = BatchSpanProcessor(exporter)
+        provider.add_span_processor(processor)
+        provider.add_span_processor(
+            TailKeepSpanProcessor(
+                processor,
+                settings.trace_slow_request_seconds,
+                settings.trace_max_pending_traces,
+            )
+        )
+        sentry_sampler = SentrySampler(rates, settings.trace_slow_request_seconds)
+        sentry_options = {
+            "traces_sampler": sentry_sampler.traces_sampler,
+            "before_send_transaction": sentry_sampler.before_send_transaction,
+        }
+    elif variant == "always_on":
+        provider = TracerProvider()
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        sentry_options = {"traces_sample_rate": 1.0}
+
+    sentry_sdk.init(
+        dsn=SENTRY_DSN if provider is not None else None,
+        transport=transport,
+        send_default_pii=True,
+        integrations=[
+            StarletteIntegration(transaction_style="endpoint"),
+            FastApiIntegration(transaction_style="endpoint"),
+        ],
+        **sentry_options,
+    )
+    tracer = provider.get_tracer(__name__) if provider is not None else None
+    posts = 0
+
+    @app.get("/")
+    async def read_root():
+        return {"message": "Booking Service"}
+
+    @app.get("/bookings/")
+    async def list_bookings():
+        return {"bookings": [], "next_cursor": None}
+
+    @app.get("/bookings/{booking_id}")
+    async def get_booking(booking_id: str):
+        return {"booking_id": booking_id}
+
+    @app.post("/bookings/")
+    async def create_booking():
+        nonlocal posts
+        posts += 1
+        for stage in STAGES:
+            if tracer is not None:
+                with tracer.start_as_current_span(f"create_booking.{stage}") as span:
+                    span.set_attribute("db.query_count", 1)
+        if failure_rate and posts % round(1 / failure_rate) == 0:
+            raise HTTPException(status_code=400, detail="No availability")
+        return {"booking_id": "B000042"}
+
+    if provider is not None:
+        FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+    return app, provider, exporter, transport
+
+
+async def drive(app, cycle: list[tuple[str, str]], requests: int) -> None:
+    async def send(message):
+        pass
+
+    for i in range(requests):
+        method, path = cycle[i % len(cycle)]
+        delivered = False
+        disconnected = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return await disconnected
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"benchmark")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        await app(scope, receive, send)
+        disconnected.cancel()
+
+
+async def run(args) -> None:
+    cycle = parse_mix(args.mix)
+    results = {}
+    for variant in VARIANTS:
+        app, provider, exporter, transport = build_app(variant, args.failure_rate)
+        await drive(app, cycle, min(args.requests, 1000))  # warm up
+        if provider is not None:
+            provider.force_flush()
+        exporter.spans = transport.transactions = 0
+        start = time.process_time()
+        await drive(app, cycle, args.requests)
+        if provider is not None:
+            # Export runs on the processor thread; process CPU time covers it
+            provider.force_flush()
+            provider.shutdown()
+        us = (time.process_time() - start) / args.requests * 1e6
+        results[variant] = (us, exporter.spans, transport.transactions)
+
+    bare = results["none"][0]
+    print(f"{args.requests} requests, mix {args.mix}, {args.rps} req/s")
+    print(
+        f"{'variant':<11}{'cpu us/req':>12}{'spans':>9}{'sentry tx':>11}"
+        f"{'tracing cores':>15}"
+    )
+    for variant, (us, spans, transactions) in results.items():
+        cores = (us - bare) * args.rps / 1e6
+        print(
+            f"{variant:<11}{us:>12.1f}{spans:>9}{transactions:>11}{cores:>15.3f}"
+        )
+    saved = (results["always_on"][0] - results["sampled"][0]) * args.rps / 1e6
+    print(f"sampling saves {saved:.3f} CPU cores at {args.rps} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rps", type=float, default=200)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    args = parser.parse_args()
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "booking_service"))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
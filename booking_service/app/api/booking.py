@@ -1,26 +1,51 @@
+import csv
+import io
+import json
 import logging
-from datetime import timedelta
+from datetime import date, timedelta
+from typing import Literal, Optional
 
-import httpx
-from fastapi import APIRouter, Body, Depends, HTTPException, Path
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Path, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
-from ..db.connection import get_db
+from ..db.connection import get_db, get_read_db, remember_write
+from ..db.models import PENDING, UNRESERVED
 from ..db.models import Booking as BookingModel
 from ..monitoring import (
     booking_failure_ratio_counter,
     db_connection_errors_counter,
     resource,
 )
-from ..schemas import Booking, BookingCreate, BookingUpdate
+from ..schemas import Booking, BookingCreate, BookingPage, BookingUpdate
+from ..service import BookingSortKey, decode_cursor, list_bookings, stream_bookings
+from ..service.booking_ids import (
+    MAX_BOOKING_ID_ATTEMPTS,
+    booking_id_allocator,
+    is_unique_violation,
+)
+from ..service.checkout import CHECKING_OUT
+from ..service.idempotency import (
+    IDEMPOTENCY_HEADER,
+    REPLAYED_HEADER,
+    IdempotencyError,
+    begin_request,
+    release_request,
+    request_fingerprint,
+    save_response,
+)
+from ..service.inventory_client import (
+    InventoryClient,
+    get_inventory_client,
+    reservation_key,
+)
+from ..service.outbox import enqueue_adjustment, outbox_relay
+from ..service.serializers import BookingJSONResponse, serialize_booking
+from ..service.stages import stage
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-INVENTORY_SERVICE_URL = "https://inventory-service.inventory.svc.cluster.local:8000/inventory"
-
 router = APIRouter(
     prefix="/bookings",
     tags=["bookings"],
@@ -36,190 +61,401 @@ def mask_pii(data):
     return data
 
 
-@router.get("/", response_model=list[Booking])
-async def read_bookings(db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=BookingPage)
+async def read_bookings(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum bookings per page"),
+    cursor: Optional[str] = Query(
+        None, description="Continuation cursor from a previous page's next_cursor"
+    ),
+    order_by: BookingSortKey = Query("created_at", description="Keyset sort column"),
+    hotel_id: Optional[int] = Query(None),
+    arrival_from: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    arrival_to: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    reservation_status: Optional[str] = Query(None, max_length=20),
+    db: AsyncSession = Depends(get_read_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor, order_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        result = await db.execute(select(BookingModel))
-        bookings = result.scalars().all()
-        booking_list = []
-        async with httpx.AsyncClient() as client:
-            for db_booking in bookings:
-                hotel_name = None
-                hotel_name_url = (
-                    f"{INVENTORY_SERVICE_URL}/hotel_name/{db_booking.hotel_id}"
+        bookings, next_cursor = await list_bookings(
+            db,
+            limit=limit,
+            sort_key=order_by,
+            after=after,
+            hotel_id=hotel_id,
+            arrival_from=arrival_from,
+            arrival_to=arrival_to,
+            reservation_status=reservation_status,
+        )
+        hotel_names = {}
+        try:
+            hotel_names = await inventory.get_hotel_names(
+                db_booking.hotel_id for db_booking in bookings
+            )
+        except Exception as e:
+            logger.warning("Error fetching hotel names for bookings: %s", e)
+        items = [
+            serialize_booking(db_booking, hotel_names.get(db_booking.hotel_id))
+            for db_booking in bookings
+        ]
+        return BookingJSONResponse({"items": items, "next_cursor": next_cursor})
+    except Exception as e:
+        logger.error("Error fetching bookings: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/export")
+async def export_bookings(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    hotel_id: Optional[int] = Query(None),
+    arrival_from: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    arrival_to: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    reservation_status: Optional[str] = Query(None, max_length=20),
+    inventory: InventoryClient = Depends(get_inventory_client),
+):
+    """Stream every matching booking as NDJSON or CSV, with PII masked.
+
+    Rows are read through a server-side cursor and written out chunk by
+    chunk, so memory stays flat however large the table is.
+    """
+    logger.info("Exporting bookings as %s", export_format)
+
+    async def generate():
+        header_written = False
+        async for chunk in stream_bookings(
+            chunk_size=EXPORT_CHUNK_SIZE,
+            hotel_id=hotel_id,
+            arrival_from=arrival_from,
+            arrival_to=arrival_to,
+            reservation_status=reservation_status,
+        ):
+            hotel_names = {}
+            try:
+                hotel_names = await inventory.get_hotel_names(
+                    row["hotel_id"] for row in chunk
                 )
-                try:
-                    hotel_resp = await client.get(hotel_name_url, timeout=5.0)
-                    if hotel_resp.status_code == 200:
-                        hotel_name = hotel_resp.json().get("hotel_name")
-                except Exception as e:
-                    logger.warning(
-                        f"Error fetching hotel name for booking {db_booking.booking_id}: {e}"
-                    )
-                booking_data = {
-                    "booking_id": db_booking.booking_id,
-                    "guest_name": "[REDACTED]",  # Mask PII
-                    "hotel_name": hotel_name,
-                    "arrival_date": db_booking.arrival_date,
-                    "stay_length": db_booking.stay_length,
-                    "check_out_date": db_booking.check_out_date,
-                    "room_type": db_booking.room_type,
-                    "adults": db_booking.adults,
-                    "children": db_booking.children,
-                    "meal_plan": db_booking.meal_plan,
-                    "market_segment": db_booking.market_segment,
-                    "is_holiday": db_booking.is_holiday,
-                    "booking_channel": db_booking.booking_channel,
-                    "room_price": db_booking.room_price,
-                    "total_price": float(db_booking.room_price) * db_booking.stay_length
-                    if db_booking.room_price is not None
-                    and db_booking.stay_length is not None
-                    else None,
-                    "reservation_status": db_booking.reservation_status,
-                    "created_at": db_booking.created_at.date()
-                    if hasattr(db_booking.created_at, "date")
-                    else db_booking.created_at,
-                }
-                booking_list.append(booking_data)
-        return booking_list
+            except Exception as e:
+                logger.warning("Error fetching hotel names for export: %s", e)
+            rows = [
+                mask_pii({**row, "hotel_name": hotel_names.get(row["hotel_id"])})
+                for row in chunk
+            ]
+            if export_format == "ndjson":
+                yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+            else:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+                if not header_written:
+                    writer.writeheader()
+                    header_written = True
+                writer.writerows(rows)
+                yield buffer.getvalue()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="bookings.{export_format}"'
+        },
+    )
+
+
+@router.get("/search", response_model=BookingPage)
+async def search_bookings(
+    hotel_id: Optional[int] = Query(None),
+    guest_name: Optional[str] = Query(
+        None,
+        min_length=1,
+        max_length=100,
+        description="Guest name prefix (case-insensitive)",
+    ),
+    stay_from: Optional[date] = Query(
+        None, description="First night of the stay range (inclusive)"
+    ),
+    stay_to: Optional[date] = Query(
+        None, description="End of the stay range (exclusive, like a check-out date)"
+    ),
+    arrival_from: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    arrival_to: Optional[date] = Query(None, description="Arrival date (inclusive)"),
+    reservation_status: Optional[str] = Query(None, max_length=20),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum bookings per page"),
+    cursor: Optional[str] = Query(
+        None, description="Continuation cursor from a previous page's next_cursor"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
+):
+    """Front-desk search by hotel or guest-name prefix, ordered by arrival.
+
+    Returns bookings whose stay overlaps ``[stay_from, stay_to)``. A hotel or
+    a guest name is required so every search starts from an index.
+    """
+    if hotel_id is None and guest_name is None:
+        raise HTTPException(
+            status_code=400, detail="Search needs a hotel_id or a guest_name"
+        )
+    if stay_from is not None and stay_to is not None and stay_from >= stay_to:
+        raise HTTPException(status_code=400, detail="stay_from must be before stay_to")
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor, "arrival_date")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        bookings, next_cursor = await list_bookings(
+            db,
+            limit=limit,
+            sort_key="arrival_date",
+            after=after,
+            hotel_id=hotel_id,
+            arrival_from=arrival_from,
+            arrival_to=arrival_to,
+            reservation_status=reservation_status,
+            stay_from=stay_from,
+            stay_to=stay_to,
+            guest_name_prefix=guest_name,
+        )
+        hotel_names = {}
+        try:
+            hotel_names = await inventory.get_hotel_names(
+                db_booking.hotel_id for db_booking in bookings
+            )
+        except Exception as e:
+            logger.warning("Error fetching hotel names for search: %s", e)
+        items = [
+            serialize_booking(db_booking, hotel_names.get(db_booking.hotel_id))
+            for db_booking in bookings
+        ]
+        return BookingJSONResponse({"items": items, "next_cursor": next_cursor})
     except Exception as e:
-        logger.error(f"Error fetching bookings: {str(e)}", exc_info=True)
+        logger.error("Error searching bookings: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/", response_model=Booking)
-async def create_booking(booking: BookingCreate, db: AsyncSession = Depends(get_db)):
-    try:
-        logger.debug(f"Received booking data: {mask_pii(booking.dict())}")
-        booking_dict = booking.dict()
-        if "hotel_name" in booking_dict:
-            booking_dict.pop("hotel_name")
-        # Set reservation_status to 'confirmed' automatically
-        booking_dict["reservation_status"] = "confirmed"
-        # Automatically calculate is_weekend
-        arrival = booking.arrival_date
-        stay = booking.stay_length
-        is_weekend = False
-        for i in range(stay):
-            day = arrival + timedelta(days=i)
-            if day.weekday() in [5, 6]:  # Saturday=5, Sunday=6
-                is_weekend = True
-                break
-        booking_dict["is_weekend"] = is_weekend
-
-        # New inventory logic: fetch inventory for hotel and room type, ignore date
-        inventory_url = f"{INVENTORY_SERVICE_URL}/{booking.hotel_id}"
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(inventory_url)
-            if resp.status_code == 200:
-                inventory_list = resp.json()
-                inventory_row = None
-                for item in inventory_list:
-                    if item["room_type"] == booking.room_type:
-                        inventory_row = item
-                        break
-                if not inventory_row:
-                    booking_failure_ratio_counter.add(
-                        1,
-                        {"service": resource.attributes.get("service.name", "unknown")},
-                    )
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Room type not found in inventory for the given hotel.",
-                    )
-                # Check available_rooms and arrival_date
-                from datetime import date as dt_date
+async def create_booking(
+    booking: BookingCreate,
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_HEADER, max_length=255
+    ),
+    db: AsyncSession = Depends(get_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
+):
+    """Create a booking.
+
+    Retries that repeat an ``Idempotency-Key`` get the stored booking back
+    instead of booking again.
+    """
+    if idempotency_key is None:
+        booking_response = BookingJSONResponse(
+            await _create_booking(booking, db, inventory)
+        )
+        remember_write(booking_response, "/bookings")
+        return booking_response
 
-                if inventory_row["available_rooms"] < 1:
-                    booking_failure_ratio_counter.add(
-                        1,
-                        {"service": resource.attributes.get("service.name", "unknown")},
-                    )
-                    raise HTTPException(
-                        status_code=400,
-                        detail="No available rooms for the selected room type.",
-                    )
-                if booking.arrival_date < dt_date.today():
-                    booking_failure_ratio_counter.add(
-                        1,
-                        {"service": resource.attributes.get("service.name", "unknown")},
-                    )
-                    raise HTTPException(
-                        status_code=400, detail="Cannot book for a past date."
-                    )
-                booking_dict["room_price"] = inventory_row["room_price"]
-            else:
+    request_hash = request_fingerprint("POST", "/bookings/", booking.dict())
+    try:
+        with stage("create_booking", "idempotency_claim"):
+            stored = await begin_request(db, idempotency_key, request_hash)
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if stored is not None:
+        logger.info("Replaying stored booking for repeated Idempotency-Key")
+        return JSONResponse(
+            stored.body,
+            status_code=stored.status_code,
+            headers={REPLAYED_HEADER: "true"},
+        )
+    try:
+        booking_data = await _create_booking(booking, db, inventory, idempotency_key)
+    except Exception:
+        # Release the key so that a retry executes the request again. The
+        # response is saved in the booking's own transaction, so a claim
+        # whose booking did commit is never released.
+        await release_request(db, idempotency_key)
+        raise
+    booking_response = BookingJSONResponse(booking_data)
+    remember_write(booking_response, "/bookings")
+    return booking_response
+
+
+async def _create_booking(
+    booking: BookingCreate,
+    db: AsyncSession,
+    inventory: InventoryClient,
+    idempotency_key: Optional[str] = None,
+) -> dict:
+    """Validate, reserve and commit a booking; return its response body.
+
+    The booking, its outbox reservation and, with ``idempotency_key``, the
+    stored response commit in one transaction, so a committed booking can
+    always be replayed and is never booked twice.
+    """
+    try:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received booking data: %s", mask_pii(booking.dict()))
+        with stage("create_booking", "validate"):
+            booking_dict = booking.dict()
+            if "hotel_name" in booking_dict:
+                booking_dict.pop("hotel_name")
+            # Confirmed, or marked unreserved, once inventory answers the
+            # reservation the outbox relay sends
+            booking_dict["reservation_status"] = PENDING
+            # Automatically calculate is_weekend
+            arrival = booking.arrival_date
+            stay = booking.stay_length
+            is_weekend = False
+            for i in range(stay):
+                day = arrival + timedelta(days=i)
+                if day.weekday() in [5, 6]:  # Saturday=5, Sunday=6
+                    is_weekend = True
+                    break
+            booking_dict["is_weekend"] = is_weekend
+
+            if booking.arrival_date < date.today():
                 booking_failure_ratio_counter.add(
                     1, {"service": resource.attributes.get("service.name", "unknown")}
                 )
                 raise HTTPException(
-                    status_code=400, detail="Failed to fetch inventory for room price."
+                    status_code=400, detail="Cannot book for a past date."
                 )
 
-        # Do not set check_out_date, as it is a generated column
-        db_booking = BookingModel(**booking_dict)
-        logger.debug(f"Created booking model: {mask_pii(db_booking.__dict__)}")
-        db.add(db_booking)
-        await db.commit()
-        await db.refresh(db_booking)
-        booking_failure_ratio_counter.add(
-            -1, {"service": resource.attributes.get("service.name", "unknown")}
-        )
+        # Inventory is per night: every night of the stay needs a free room
+        last_night = booking.arrival_date + timedelta(days=booking.stay_length - 1)
+        with stage("create_booking", "inventory_fetch"):
+            resp = await inventory.get_inventory(
+                booking.hotel_id,
+                params={
+                    "start_date": str(booking.arrival_date),
+                    "end_date": str(last_night),
+                },
+            )
+        if resp.status_code == 200:
+            with stage("create_booking", "parse_inventory"):
+                nights = {
+                    item["date"]: item
+                    for item in resp.json()
+                    if item["room_type"] == booking.room_type
+                }
+            if not nights:
+                booking_failure_ratio_counter.add(
+                    1,
+                    {"service": resource.attributes.get("service.name", "unknown")},
+                )
+                raise HTTPException(
+                    status_code=400,
+                    detail="Room type not found in inventory for the given hotel.",
+                )
+            stay_nights = [
+                str(booking.arrival_date + timedelta(days=i))
+                for i in range(booking.stay_length)
+            ]
+            if any(
+                night not in nights or nights[night]["available_rooms"] < 1
+                for night in stay_nights
+            ):
+                booking_failure_ratio_counter.add(
+                    1,
+                    {"service": resource.attributes.get("service.name", "unknown")},
+                )
+                raise HTTPException(
+                    status_code=400,
+                    detail="No available rooms for the selected room type and dates.",
+                )
+            # The booking carries one nightly rate: the arrival night's price
+            booking_dict["room_price"] = nights[stay_nights[0]]["room_price"]
+        elif resp.status_code == 404:
+            booking_failure_ratio_counter.add(
+                1, {"service": resource.attributes.get("service.name", "unknown")}
+            )
+            raise HTTPException(
+                status_code=400,
+                detail="No available rooms for the selected room type and dates.",
+            )
+        else:
+            booking_failure_ratio_counter.add(
+                1, {"service": resource.attributes.get("service.name", "unknown")}
+            )
+            raise HTTPException(
+                status_code=400, detail="Failed to fetch inventory for room price."
+            )
 
-        # Adjust inventory for the booking (remove one room for the room type)
-        adjust_payload = {
-            "room_type": booking.room_type,
-            "date": str(inventory_row["date"]),  # Use the date from inventory row
-            "num_rooms": 1,
-        }
-        async with httpx.AsyncClient() as client:
-            adjust_url = f"{INVENTORY_SERVICE_URL}/{booking.hotel_id}/adjust"
-            try:
-                resp = await client.post(adjust_url, json=adjust_payload, timeout=5.0)
-                if resp.status_code != 200:
+        # Resolved before the write transaction starts, so the response can
+        # be stored with the booking
+        with stage("create_booking", "hotel_name_fetch"):
+            hotel_name = await inventory.get_hotel_name(booking.hotel_id)
+
+        for attempt in range(1, MAX_BOOKING_ID_ATTEMPTS + 1):
+            with stage("create_booking", "allocate_id"):
+                booking_dict["booking_id"] = await booking_id_allocator.allocate(db)
+            # Do not set check_out_date, as it is a generated column
+            db_booking = BookingModel(**booking_dict)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Created booking model: %s", mask_pii(db_booking.__dict__)
+                )
+            with stage("create_booking", "insert"):
+                try:
+                    # A savepoint, so a taken ID only undoes this attempt
+                    async with db.begin_nested():
+                        db.add(db_booking)
+                        # Take one room on every night of the stay, via the
+                        # outbox, so the reservation commits with the booking
+                        # and is delivered after it
+                        enqueue_adjustment(
+                            db,
+                            booking.hotel_id,
+                            {
+                                "room_type": booking.room_type,
+                                "date": str(booking.arrival_date),
+                                "num_rooms": 1,
+                                "nights": booking.stay_length,
+                            },
+                            reservation_key(db_booking.booking_id, "reserve"),
+                        )
+                except IntegrityError as e:
+                    # The ID can still be held by a booking from before IDs
+                    # were allocated; every unique key here derives from it
+                    if not is_unique_violation(e) or attempt == MAX_BOOKING_ID_ATTEMPTS:
+                        raise
                     logger.warning(
-                        f"Inventory adjustment failed for {adjust_payload}: {resp.text}"
+                        "Booking ID %s is already taken, allocating another",
+                        booking_dict["booking_id"],
                     )
-            except Exception as e:
-                logger.warning(f"Error calling inventory service: {e}")
-
-        # Fetch hotel_name from inventory service
-        async with httpx.AsyncClient() as client:
-            hotel_name_url = f"{INVENTORY_SERVICE_URL}/hotel_name/{db_booking.hotel_id}"
-            hotel_resp = await client.get(hotel_name_url, timeout=5.0)
-            if hotel_resp.status_code == 200:
-                hotel_name = hotel_resp.json().get("hotel_name")
-            else:
-                hotel_name = None
+                    continue
+            break
+        # Generated columns and server defaults, read inside the transaction
+        with stage("create_booking", "refresh"):
+            await db.refresh(db_booking)
 
         # Convert the SQLAlchemy model instance to a dict with the exact fields expected by the Pydantic model
-        booking_data = {
-            "booking_id": db_booking.booking_id,
-            "guest_name": "[REDACTED]",  # Mask PII
-            "hotel_name": hotel_name,
-            "arrival_date": db_booking.arrival_date,
-            "stay_length": db_booking.stay_length,
-            "check_out_date": db_booking.check_out_date,
-            "room_type": db_booking.room_type,
-            "adults": db_booking.adults,
-            "children": db_booking.children,
-            "meal_plan": db_booking.meal_plan,
-            "market_segment": db_booking.market_segment,
-            "is_holiday": db_booking.is_holiday,
-            "booking_channel": db_booking.booking_channel,
-            "room_price": db_booking.room_price,
-            "total_price": float(db_booking.room_price) * db_booking.stay_length
-            if db_booking.room_price is not None and db_booking.stay_length is not None
-            else None,
-            "reservation_status": db_booking.reservation_status,
-            "created_at": db_booking.created_at.date()
-            if hasattr(db_booking.created_at, "date")
-            else db_booking.created_at,
-        }
-        logger.debug(f"Final response data: {mask_pii(booking_data)}")
-        return booking_data
+        with stage("create_booking", "serialize"):
+            booking_data = serialize_booking(db_booking, hotel_name)
+        if idempotency_key is not None:
+            with stage("create_booking", "idempotency_save"):
+                await save_response(
+                    db,
+                    idempotency_key,
+                    200,
+                    json.loads(BookingJSONResponse(booking_data).body),
+                )
+        with stage("create_booking", "commit"):
+            await db.commit()
+    except HTTPException:
+        # Already counted as a failure where it was raised
+        raise
     except Exception as e:
-        logger.error(f"Error creating booking: {str(e)}", exc_info=True)
+        logger.error("Error creating booking: %s", e, exc_info=True)
         try:
             await db.rollback()
         except Exception:
@@ -230,55 +466,34 @@ async def create_booking(booking: BookingCreate, db: AsyncSession = Depends(get_
             1, {"service": resource.attributes.get("service.name", "unknown")}
         )
         raise HTTPException(status_code=500, detail=str(e))
+    outbox_relay.notify()
+    booking_failure_ratio_counter.add(
+        -1, {"service": resource.attributes.get("service.name", "unknown")}
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Final response data: %s", mask_pii(booking_data))
+    return booking_data
 
 
 @router.get("/{booking_id}", response_model=Booking)
 async def get_booking_by_id(
     booking_id: str = Path(..., description="The 7-character booking ID"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
 ):
     try:
         db_booking = await db.get(BookingModel, booking_id)
         if not db_booking:
             raise HTTPException(status_code=404, detail="Booking not found")
 
-        # Fetch hotel_name from inventory service
-        async with httpx.AsyncClient() as client:
-            hotel_name_url = f"{INVENTORY_SERVICE_URL}/hotel_name/{db_booking.hotel_id}"
-            hotel_resp = await client.get(hotel_name_url, timeout=5.0)
-            if hotel_resp.status_code == 200:
-                hotel_name = hotel_resp.json().get("hotel_name")
-            else:
-                hotel_name = None
-
-        booking_data = {
-            "booking_id": db_booking.booking_id,
-            "guest_name": "[REDACTED]",  # Mask PII
-            "hotel_name": hotel_name,
-            "arrival_date": db_booking.arrival_date,
-            "stay_length": db_booking.stay_length,
-            "check_out_date": db_booking.check_out_date,
-            "room_type": db_booking.room_type,
-            "adults": db_booking.adults,
-            "children": db_booking.children,
-            "meal_plan": db_booking.meal_plan,
-            "market_segment": db_booking.market_segment,
-            "is_holiday": db_booking.is_holiday,
-            "booking_channel": db_booking.booking_channel,
-            "room_price": db_booking.room_price,
-            "total_price": float(db_booking.room_price) * db_booking.stay_length
-            if db_booking.room_price is not None and db_booking.stay_length is not None
-            else None,
-            "reservation_status": db_booking.reservation_status,
-            "created_at": db_booking.created_at.date()
-            if hasattr(db_booking.created_at, "date")
-            else db_booking.created_at,
-        }
-        return booking_data
+        # Fetch hotel_name from inventory service (cached)
+        hotel_name = await inventory.get_hotel_name(db_booking.hotel_id)
+
+        return BookingJSONResponse(serialize_booking(db_booking, hotel_name))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching booking: {str(e)}", exc_info=True)
+        logger.error("Error fetching booking: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -286,73 +501,55 @@ async def get_booking_by_id(
 async def cancel_booking(
     booking_id: str = Path(..., description="The 7-character booking ID to cancel"),
     db: AsyncSession = Depends(get_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
 ):
     try:
-        db_booking = await db.get(BookingModel, booking_id)
+        # Locked so the outbox relay and the checkout sweep cannot move the
+        # booking between the status checks and the cancel
+        db_booking = await db.get(BookingModel, booking_id, with_for_update=True)
         if not db_booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         if str(getattr(db_booking, "reservation_status")).lower() == "cancelled":
             raise HTTPException(status_code=400, detail="Booking is already cancelled")
+        if db_booking.reservation_status in (CHECKING_OUT, "checked-out"):
+            # The checkout sweep returns (or has returned) these rooms itself
+            raise HTTPException(
+                status_code=409, detail="Booking is checked out and cannot be cancelled"
+            )
 
-        # Mark as cancelled
+        # Mark as cancelled and return one room to inventory (for the entire
+        # stay) via the outbox, in the same transaction. An unreserved
+        # booking never took its rooms, so there is nothing to return.
+        reserved = db_booking.reservation_status != UNRESERVED
         db_booking.reservation_status = "cancelled"  # type: ignore[attr-defined]
+        if reserved:
+            enqueue_adjustment(
+                db,
+                db_booking.hotel_id,
+                {
+                    "room_type": db_booking.room_type,
+                    "date": str(db_booking.arrival_date),
+                    "num_rooms": -1,
+                    "nights": db_booking.stay_length,
+                },
+                reservation_key(db_booking.booking_id, "release"),
+            )
         await db.commit()
+        outbox_relay.notify()
         await db.refresh(db_booking)
 
-        # Return one room to inventory (for the entire stay)
-        adjust_payload = {
-            "room_type": db_booking.room_type,
-            "date": str(db_booking.arrival_date),
-            "num_rooms": -1,
-        }
-        async with httpx.AsyncClient() as client:
-            adjust_url = f"{INVENTORY_SERVICE_URL}/{db_booking.hotel_id}/adjust"
-            try:
-                resp = await client.post(adjust_url, json=adjust_payload, timeout=5.0)
-                if resp.status_code != 200:
-                    logger.warning(
-                        f"Inventory adjustment (return) failed for {adjust_payload}: {resp.text}"
-                    )
-            except Exception as e:
-                logger.warning(f"Error calling inventory service to return room: {e}")
-
-        # Fetch hotel_name from inventory service
-        async with httpx.AsyncClient() as client:
-            hotel_name_url = f"{INVENTORY_SERVICE_URL}/hotel_name/{db_booking.hotel_id}"
-            hotel_resp = await client.get(hotel_name_url, timeout=5.0)
-            if hotel_resp.status_code == 200:
-                hotel_name = hotel_resp.json().get("hotel_name")
-            else:
-                hotel_name = None
-
-        booking_data = {
-            "booking_id": db_booking.booking_id,
-            "guest_name": "[REDACTED]",  # Mask PII
-            "hotel_name": hotel_name,
-            "arrival_date": db_booking.arrival_date,
-            "stay_length": db_booking.stay_length,
-            "check_out_date": db_booking.check_out_date,
-            "room_type": db_booking.room_type,
-            "adults": db_booking.adults,
-            "children": db_booking.children,
-            "meal_plan": db_booking.meal_plan,
-            "market_segment": db_booking.market_segment,
-            "is_holiday": db_booking.is_holiday,
-            "booking_channel": db_booking.booking_channel,
-            "room_price": db_booking.room_price,
-            "total_price": float(db_booking.room_price) * db_booking.stay_length
-            if db_booking.room_price is not None and db_booking.stay_length is not None
-            else None,
-            "reservation_status": db_booking.reservation_status,
-            "created_at": db_booking.created_at.date()
-            if hasattr(db_booking.created_at, "date")
-            else db_booking.created_at,
-        }
-        return booking_data
+        # Fetch hotel_name from inventory service (cached)
+        hotel_name = await inventory.get_hotel_name(db_booking.hotel_id)
+
+        booking_response = BookingJSONResponse(
+            serialize_booking(db_booking, hotel_name)
+        )
+        remember_write(booking_response, "/bookings")
+        return booking_response
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error cancelling booking: {str(e)}", exc_info=True)
+        logger.error("Error cancelling booking: %s", e, exc_info=True)
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -362,6 +559,7 @@ async def update_booking(
     booking_id: str = Path(..., description="The 7-character booking ID to update"),
     booking_update: BookingUpdate = Body(...),
     db: AsyncSession = Depends(get_db),
+    inventory: InventoryClient = Depends(get_inventory_client),
 ):
     try:
         db_booking = await db.get(BookingModel, booking_id)
@@ -382,42 +580,17 @@ async def update_booking(
         await db.commit()
         await db.refresh(db_booking)
 
-        # Fetch hotel_name from inventory service
-        async with httpx.AsyncClient() as client:
-            hotel_name_url = f"{INVENTORY_SERVICE_URL}/hotel_name/{db_booking.hotel_id}"
-            hotel_resp = await client.get(hotel_name_url, timeout=5.0)
-            if hotel_resp.status_code == 200:
-                hotel_name = hotel_resp.json().get("hotel_name")
-            else:
-                hotel_name = None
-
-        booking_data = {
-            "booking_id": db_booking.booking_id,
-            "guest_name": "[REDACTED]",  # Mask PII
-            "hotel_name": hotel_name,
-            "arrival_date": db_booking.arrival_date,
-            "stay_length": db_booking.stay_length,
-            "check_out_date": db_booking.check_out_date,
-            "room_type": db_booking.room_type,
-            "adults": db_booking.adults,
-            "children": db_booking.children,
-            "meal_plan": db_booking.meal_plan,
-            "market_segment": db_booking.market_segment,
-            "is_holiday": db_booking.is_holiday,
-            "booking_channel": db_booking.booking_channel,
-            "room_price": db_booking.room_price,
-            "total_price": float(db_booking.room_price) * db_booking.stay_length
-            if db_booking.room_price is not None and db_booking.stay_length is not None
-            else None,
-            "reservation_status": db_booking.reservation_status,
-            "created_at": db_booking.created_at.date()
-            if hasattr(db_booking.created_at, "date")
-            else db_booking.created_at,
-        }
-        return booking_data
+        # Fetch hotel_name from inventory service (cached)
+        hotel_name = await inventory.get_hotel_name(db_booking.hotel_id)
+
+        booking_response = BookingJSONResponse(
+            serialize_booking(db_booking, hotel_name)
+        )
+        remember_write(booking_response, "/bookings")
+        return booking_response
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating booking: {str(e)}", exc_info=True)
+        logger.error("Error updating booking: %s", e, exc_info=True)
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
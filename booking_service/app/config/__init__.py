@@ -0,0 +1,76 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime settings, read from environment variables (case-insensitive)."""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Root log level (DEBUG in dev, INFO in prod). DEBUG records are sampled
+    # to this many per second per call site; 0 keeps them all.
+    log_level: str = "INFO"
+    log_debug_rate_per_second: float = 5.0
+    log_queue_size: int = 10000
+
+    # Trace sampling, for OTel and Sentry alike. New traces are kept at
+    # trace_sample_rate, or at their route's rate ("METHOD /route/template").
+    # Requests on trace_keep_routes are also kept whenever they fail (status
+    # 400 or above) or take trace_slow_request_seconds or longer.
+    trace_sample_rate: float = 0.05
+    trace_sample_route_rates: dict[str, float] = {"GET /": 0.01}
+    trace_keep_routes: list[str] = ["POST /bookings/"]
+    trace_slow_request_seconds: float = 1.0
+    trace_max_pending_traces: int = 1000
+
+    database_url: Optional[str] = None
+    # Per replica: 3 replicas x (pool_size + max_overflow) share one RDS
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    db_pool_timeout_seconds: float = 10.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache per connection; 0 behind PgBouncer
+    db_statement_cache_size: int = 100
+    db_echo: bool = False
+
+    # Optional read replica for GET endpoints. Reads fall back to the primary
+    # while replica lag exceeds the threshold, and for a client's own writes
+    # during the read-your-writes window.
+    database_read_url: Optional[str] = None
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 5.0
+    read_your_writes_seconds: float = 10.0
+
+    inventory_service_url: str = (
+        "https://inventory-service.inventory.svc.cluster.local:8000/inventory"
+    )
+    inventory_max_connections: int = 100
+    inventory_max_keepalive_connections: int = 20
+    inventory_keepalive_expiry_seconds: float = 30.0
+    inventory_http2: bool = False
+    inventory_timeout_seconds: float = 5.0
+    inventory_connect_timeout_seconds: float = 2.0
+
+    hotel_cache_ttl_seconds: float = 300.0
+    hotel_cache_max_entries: int = 1024
+
+    checkout_sweep_chunk_size: int = 500
+
+    # Outbox relay: delivery of booking-to-inventory adjustments
+    outbox_batch_size: int = 100
+    outbox_poll_interval_seconds: float = 1.0
+    outbox_lease_seconds: float = 30.0
+    outbox_max_attempts: int = 10
+    outbox_backoff_base_seconds: float = 1.0
+    outbox_backoff_max_seconds: float = 300.0
+
+    # Stored responses are replayed for this long; a claim on a key whose
+    # request has not finished is released after the lock timeout.
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_lock_timeout_seconds: float = 60.0
+    idempotency_purge_interval_seconds: float = 3600.0
+
+
+settings = Settings()
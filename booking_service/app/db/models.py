@@ -1,15 +1,20 @@
-import random
-import string
-
 from sqlalchemy import (
+    JSON,
+    BigInteger,
     Boolean,
     Column,
     Computed,
     Date,
+    DateTime,
+    Identity,
     Index,
     Integer,
     Numeric,
+    Sequence,
+    SmallInteger,
     String,
+    Text,
+    text,
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
@@ -17,15 +22,31 @@ from sqlalchemy.sql import func
 Base = declarative_base()
 
 
+# Each nextval() reserves a block of BOOKING_ID_BLOCK_SIZE booking numbers,
+# which service/booking_ids.py hands out in-process
+BOOKING_ID_BLOCK_SIZE = 1000
+booking_id_seq = Sequence(
+    "booking_id_block_seq",
+    start=0,
+    minvalue=0,
+    increment=BOOKING_ID_BLOCK_SIZE,
+    metadata=Base.metadata,
+)
+
+
+# Status of a live booking; matched as a literal so the partial index applies
+CONFIRMED = "confirmed"
+# A new booking, until the outbox relay hears back on its reservation
+PENDING = "pending"
+# Inventory rejected the booking's reservation, so it holds no rooms
+UNRESERVED = "unreserved"
+
+
 class Booking(Base):
     __tablename__ = "booking"
 
-    def generate_booking_id():
-        return "".join(random.choices(string.ascii_uppercase + string.digits, k=7))
-
-    booking_id = Column(
-        String(7), primary_key=True, default=generate_booking_id, unique=True
-    )
+    # Assigned by BookingIdAllocator before insert
+    booking_id = Column(String(7), primary_key=True, unique=True)
     guest_name = Column(String(100), nullable=False)
     hotel_id = Column(Integer, nullable=False)
     arrival_date = Column(Date, nullable=False)
@@ -47,8 +68,89 @@ class Booking(Base):
         Numeric(10, 2), Computed("room_price * stay_length", persisted=True)
     )
     created_at = Column(Date, server_default=func.current_date())
+    # The checkout sweep run that claimed the booking; its Idempotency-Key
+    checkout_run = Column(String(64), nullable=True)
 
     __table_args__ = (
-        Index("ix_booking_hotel_id", "hotel_id"),
+        # Hotel lookups and hotel + stay-overlap search; check_out_date is
+        # carried in the leaf so the overlap filter needs no heap visit
+        Index(
+            "ix_booking_hotel_id_arrival_date",
+            "hotel_id",
+            "arrival_date",
+            postgresql_include=["check_out_date"],
+        ),
+        # Same search restricted to live bookings, a fraction of the table
+        Index(
+            "ix_booking_confirmed_hotel_id_arrival_date",
+            "hotel_id",
+            "arrival_date",
+            postgresql_include=["check_out_date"],
+            postgresql_where=text(f"reservation_status = '{CONFIRMED}'"),
+        ),
+        # Case-insensitive guest-name prefix search, narrowed by arrival date
+        Index(
+            "ix_booking_guest_name_arrival_date",
+            func.lower(guest_name).label("guest_name_lower"),
+            "arrival_date",
+            postgresql_ops={"guest_name_lower": "text_pattern_ops"},
+        ),
         Index("ix_booking_arrival_date", "arrival_date"),
+        # Keyset pagination order for GET /bookings/
+        Index("ix_booking_created_at_booking_id", "created_at", "booking_id"),
+    )
+
+
+class IdempotencyKey(Base):
+    """Outcome of a request sent with an ``Idempotency-Key`` header.
+
+    ``status_code`` is NULL while the first request is still executing.
+    Rows are deleted once ``expires_at`` has passed.
+    """
+
+    __tablename__ = "booking_idempotency_key"
+
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(SmallInteger, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    locked_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_booking_idempotency_key_expires_at", "expires_at"),)
+
+
+class OutboxEvent(Base):
+    """Inventory adjustment owed for a booking change, written in the same
+    transaction as the change and delivered by the outbox relay.
+
+    Delivered events are deleted; events that cannot be delivered are kept
+    with ``status = 'failed'``.
+    """
+
+    __tablename__ = "booking_outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # Sent as the Idempotency-Key, so redelivery never adjusts twice
+    idempotency_key = Column(String(255), nullable=False, unique=True)
+    hotel_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    last_error = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_booking_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
     )
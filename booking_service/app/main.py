@@ -1,17 +1,29 @@
-import time
-from datetime import date as dt_date
+import asyncio
+import logging
+from datetime import datetime
 # import os
 
-import httpx
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from sqlalchemy import select
 
 from .api import booking
-from .db.connection import engine
-from .db.models import Base
+from .config import settings
+from .db.connection import (
+    AsyncSessionLocal,
+    create_missing_indexes,
+    create_tables,
+    replica_monitor,
+    track_queries,
+)
+from .middleware import MetricsMiddleware
 from .monitoring import request_counter, request_duration_histogram, resource
+from .service.checkout import sweep_checkouts
+from .service.idempotency import purge_expired_keys
+from .service.inventory_client import inventory_client
+from .service.outbox import outbox_relay
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Booking Service")
 
@@ -20,14 +32,36 @@ FastAPIInstrumentor.instrument_app(app)
 
 @app.on_event("startup")
 async def startup_event():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await inventory_client.start()
+    await create_tables()
+    # In the background, so a long build on a large table does not hold up startup
+    app.state.index_build_task = asyncio.create_task(build_missing_indexes())
+    outbox_relay.start()
+    if replica_monitor is not None:
+        replica_monitor.start()
     # Start APScheduler
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(return_rooms_after_checkout, "interval", days=1)
+    # Run once at startup too, so a sweep interrupted by a restart resumes
+    scheduler.add_job(
+        return_rooms_after_checkout, "interval", days=1, next_run_time=datetime.now()
+    )
+    scheduler.add_job(
+        purge_idempotency_keys,
+        "interval",
+        seconds=settings.idempotency_purge_interval_seconds,
+    )
     scheduler.start()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.index_build_task.cancel()
+    await outbox_relay.stop()
+    if replica_monitor is not None:
+        await replica_monitor.stop()
+    await inventory_client.aclose()
+
+
 app.include_router(booking.router)
 
 
@@ -65,64 +99,38 @@ def read_root():
 #             return {"error": str(e), "fallback_price": 100.0}
 
 
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    labels = {
-        "service": resource.attributes.get("service.name", "unknown"),
-        "method": request.method,
-        "path": request.url.path,
-    }
-    start_time = time.time()
+app.add_middleware(
+    MetricsMiddleware,
+    service=resource.attributes.get("service.name", "unknown"),
+    duration_histogram=request_duration_histogram,
+    request_counter=request_counter,
+    track_queries=track_queries,
+)
+
+
+async def build_missing_indexes():
+    """Build model indexes missing from tables created before they were added."""
+    try:
+        built = await create_missing_indexes()
+        if built:
+            logger.info("Built indexes: %s", ", ".join(built))
+    except Exception as e:
+        logger.error("Index build failed: %s", e, exc_info=True)
+
+
+async def purge_idempotency_keys():
+    """Delete expired idempotency keys."""
+    async with AsyncSessionLocal() as db:
+        removed = await purge_expired_keys(db)
+    logger.info("Purged %s expired idempotency keys", removed)
+
+
+async def return_rooms_after_checkout():
+    """Check out confirmed bookings past their check-out date, in bulk chunks."""
     try:
-        response: Response = await call_next(request)
-        duration = time.time() - start_time
-        request_duration_histogram.record(duration, labels)
-        request_counter.add(1, {**labels, "status_code": str(response.status_code)})
-        return response
-    except Exception:
-        duration = time.time() - start_time
-        request_duration_histogram.record(duration, labels)
-        request_counter.add(1, {**labels, "status_code": "500"})
-        raise
-
-
-default_return_rooms_after_checkout = None
-try:
-    default_return_rooms_after_checkout = return_rooms_after_checkout
-except NameError:
-    pass
-
-
-def return_rooms_after_checkout():
-    from .db.connection import AsyncSessionLocal
-    from .db.models import Booking as BookingModel
-
-    async def _return_rooms():
-        async with AsyncSessionLocal() as db:
-            # Find bookings with check_out_date < today and reservation_status == 'confirmed'
-            result = await db.execute(
-                select(BookingModel).where(
-                    BookingModel.check_out_date < dt_date.today(),
-                    BookingModel.reservation_status == "confirmed",
-                )
-            )
-            bookings = result.scalars().all()
-            for booking in bookings:
-                # Call inventory service to increment available_rooms
-                inventory_service_url = "https://inventory-service.inventory.svc.cluster.local:8000"
-                adjust_url = f"{inventory_service_url}/{booking.hotel_id}/adjust"
-                adjust_payload = {
-                    "room_type": booking.room_type,
-                    "date": str(booking.arrival_date),  # Use arrival_date as reference
-                    "num_rooms": -1,  # -1 to increment (reverse of booking)
-                }
-                async with httpx.AsyncClient() as client:
-                    try:
-                        await client.post(adjust_url, json=adjust_payload, timeout=5.0)
-                    except Exception:
-                        pass  # Optionally log error
-                # Update booking status to 'checked-out'
-                booking.reservation_status = "checked-out"
-            await db.commit()
-
-    return _return_rooms
+        swept = await sweep_checkouts(
+            inventory_client, chunk_size=settings.checkout_sweep_chunk_size
+        )
+        logger.info("Checked out %s bookings", swept)
+    except Exception as e:
+        logger.error("Checkout sweep failed: %s", e, exc_info=True)
@@ -0,0 +1,275 @@
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
+
+# TraceIdRatioBased draws on the low 64 bits of the trace ID
+_TRACE_ID_MASK = (1 << 64) - 1
+
+
+def _template_regex(template: str) -> re.Pattern:
+    literals = re.split(r"\{[^}]*\}", template)
+    return re.compile("[^/]+".join(re.escape(literal) for literal in literals))
+
+
+def _ratio_sampled(trace_id: int, rate: float) -> bool:
+    return trace_id & _TRACE_ID_MASK < TraceIdRatioBased.get_bound_for_rate(rate)
+
+
+class RouteRates:
+    """Trace sample rates by route, keyed ``"METHOD /route/template"``.
+
+    Routes without an entry use ``default_rate``. ``keep_routes`` are routes
+    whose requests are kept whenever they fail or run slow, whatever their
+    rate. Raw paths are matched to routes with literal routes first, so
+    ``GET /bookings/search`` is never taken for ``GET /bookings/{booking_id}``.
+    """
+
+    def __init__(
+        self,
+        default_rate: float,
+        route_rates: Mapping[str, float],
+        keep_routes: Iterable[str] = (),
+    ):
+        self.default_rate = default_rate
+        self.route_rates = dict(route_rates)
+        self.keep_routes = frozenset(keep_routes)
+        patterns = []
+        for route in sorted({*self.route_rates, *self.keep_routes}):
+            method, _, template = route.partition(" ")
+            patterns.append(
+                (template.count("{"), method.upper(), _template_regex(template), route)
+            )
+        patterns.sort(key=lambda pattern: pattern[0])
+        self._patterns = [pattern[1:] for pattern in patterns]
+
+    def route_for(self, method: str, path: str) -> Optional[str]:
+        """The configured route that ``method`` and raw ``path`` fall under."""
+        for route_method, regex, route in self._patterns:
+            if route_method == method and regex.fullmatch(path):
+                return route
+        return None
+
+    def rate(self, route: Optional[str]) -> float:
+        return self.route_rates.get(route, self.default_rate)
+
+    def keeps(self, route: Optional[str]) -> bool:
+        return route in self.keep_routes
+
+
+class RouteSampler(Sampler):
+    """Root sampler applying per-route trace ID ratios.
+
+    The route is the root span's name, which the FastAPI instrumentation
+    sets to the method and matched route template. Keep-route requests
+    that lose the draw are recorded but not sampled, so that
+    ``TailKeepSpanProcessor`` can still export them if they fail or run
+    slow. Any other request that loses the draw is dropped before its spans
+    are built.
+    """
+
+    def __init__(self, rates: RouteRates):
+        self.rates = rates
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ) -> SamplingResult:
+        if _ratio_sampled(trace_id, self.rates.rate(name)):
+            decision = Decision.RECORD_AND_SAMPLE
+        elif self.rates.keeps(name):
+            decision = Decision.RECORD_ONLY
+        else:
+            decision = Decision.DROP
+        return SamplingResult(
+            decision,
+            attributes if decision.is_recording() else None,
+            trace.get_current_span(parent_context).get_span_context().trace_state,
+        )
+
+    def get_description(self) -> str:
+        return f"RouteSampler{{default:{self.rates.default_rate}}}"
+
+
+class _RecordingParentSampler(Sampler):
+    """Records children of a recorded but unsampled local parent, so a trace
+    kept after the fact is complete."""
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ) -> SamplingResult:
+        parent = trace.get_current_span(parent_context)
+        if parent.is_recording():
+            return SamplingResult(
+                Decision.RECORD_ONLY,
+                attributes,
+                parent.get_span_context().trace_state,
+            )
+        return SamplingResult(Decision.DROP)
+
+    def get_description(self) -> str:
+        return "RecordingParentSampler"
+
+
+def make_sampler(rates: RouteRates) -> Sampler:
+    """Follow the caller's decision; sample new traces by route."""
+    return ParentBased(
+        RouteSampler(rates), local_parent_not_sampled=_RecordingParentSampler()
+    )
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    context = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            context.trace_id,
+            context.span_id,
+            context.is_remote,
+            TraceFlags(TraceFlags.SAMPLED),
+            context.trace_state,
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailKeepSpanProcessor(SpanProcessor):
+    """Exports recorded but unsampled traces that fail or run slow.
+
+    Spans of such traces are buffered until their local root span ends. If
+    the root has an error status, an HTTP status of 400 or above, or took
+    at least ``slow_seconds``, they are passed to ``processor`` flagged as
+    sampled. Otherwise they are discarded. Sampled spans are left alone;
+    ``processor`` is registered for those itself. At most
+    ``max_pending_traces`` traces are buffered, and the oldest is discarded
+    beyond that.
+    """
+
+    def __init__(
+        self,
+        processor: SpanProcessor,
+        slow_seconds: float,
+        max_pending_traces: int = 1000,
+    ):
+        self.processor = processor
+        self.slow_ns = int(slow_seconds * 1e9)
+        self.max_pending_traces = max_pending_traces
+        self._pending: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled:
+            return
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._pending.pop(trace_id, [])
+            spans.append(span)
+            if span.parent is not None and not span.parent.is_remote:
+                self._pending[trace_id] = spans
+                while len(self._pending) > self.max_pending_traces:
+                    self._pending.popitem(last=False)
+                return
+        if self._keep(span):
+            for kept in spans:
+                self.processor.on_end(_as_sampled(kept))
+
+    def _keep(self, root: ReadableSpan) -> bool:
+        if root.status.status_code is StatusCode.ERROR:
+            return True
+        attributes = root.attributes or {}
+        status = attributes.get(
+            "http.response.status_code", attributes.get("http.status_code")
+        )
+        if status is not None and int(status) >= 400:
+            return True
+        return root.end_time - root.start_time >= self.slow_ns
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+
+def _duration_seconds(event: dict[str, Any]) -> float:
+    start, end = event.get("start_timestamp"), event.get("timestamp")
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return (end - start).total_seconds()
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+        return end - start
+    return 0.0
+
+
+class SentrySampler:
+    """``traces_sampler`` and ``before_send_transaction`` for ``sentry_sdk.init``.
+
+    Transactions follow an upstream decision, or else their route's rate.
+    Keep routes are started at 100%. Transactions that did not fail, were
+    not slow and lost the rate draw are dropped in
+    ``before_send_transaction``. Error events are not affected by trace
+    sampling, so every error is still reported.
+    """
+
+    def __init__(self, rates: RouteRates, slow_seconds: float):
+        self.rates = rates
+        self.slow_seconds = slow_seconds
+
+    def traces_sampler(self, sampling_context: dict[str, Any]) -> float:
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        scope = sampling_context.get("asgi_scope") or {}
+        if scope.get("type") != "http":
+            return self.rates.default_rate
+        route = self.rates.route_for(scope["method"], scope["path"])
+        return 1.0 if self.rates.keeps(route) else self.rates.rate(route)
+
+    def before_send_transaction(self, event, hint):
+        request = event.get("request") or {}
+        route = self.rates.route_for(
+            request.get("method", ""), urlsplit(request.get("url", "")).path
+        )
+        trace_context = event.get("contexts", {}).get("trace", {})
+        if (
+            not self.rates.keeps(route)
+            or trace_context.get("parent_span_id")
+            or trace_context.get("status") not in (None, "ok")
+            or _duration_seconds(event) >= self.slow_seconds
+        ):
+            return event
+        trace_id = int(trace_context.get("trace_id") or "0", 16)
+        return event if _ratio_sampled(trace_id, self.rates.rate(route)) else None
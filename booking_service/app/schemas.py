@@ -47,11 +47,15 @@ class Booking(BookingBase):
         from_attributes = True
 
 
+class BookingPage(BaseModel):
+    items: list[Booking]
+    next_cursor: Optional[str] = None
+
+
 class BookingUpdate(BaseModel):
+    # No arrival_date, stay_length or room_type: the reserved nights would
+    # not move with them. Changing the stay means cancelling and rebooking.
     guest_name: Optional[str] = Field(None, max_length=100)
-    arrival_date: Optional[date] = None
-    stay_length: Optional[int] = Field(None, gt=0)
-    room_type: Optional[str] = Field(None, max_length=50)
     adults: Optional[int] = Field(None, gt=0)
     children: Optional[int] = Field(None, ge=0)
     # You can add more fields here if you want to allow them to be patched
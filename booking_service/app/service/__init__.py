@@ -0,0 +1,186 @@
+import base64
+import json
+from collections.abc import AsyncIterator
+from datetime import date
+from typing import Any, Literal, Optional
+
+from sqlalchemy import func, literal_column, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..db.connection import AsyncSessionLocal
+from ..db.models import CONFIRMED, Booking
+from .serializers import BOOKING_FIELDS
+
+BookingSortKey = Literal["created_at", "arrival_date"]
+
+# Columns a booking listing needs: the response fields plus hotel_id for the
+# hotel name lookup
+LISTING_COLUMNS = [getattr(Booking, field) for field in BOOKING_FIELDS] + [
+    Booking.hotel_id
+]
+
+
+def encode_cursor(sort_key: BookingSortKey, sort_value: date, booking_id: str) -> str:
+    payload = {"k": sort_key, "v": sort_value.isoformat(), "id": booking_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: BookingSortKey) -> tuple[date, str]:
+    """Return the ``(sort_value, booking_id)`` keyset position of ``cursor``.
+
+    Raises ``ValueError`` for malformed cursors or cursors issued for a
+    different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        position = date.fromisoformat(payload["v"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if payload.get("k") != sort_key:
+        raise ValueError("Cursor was issued for a different sort order")
+    return position
+
+
+def _filter_bookings(
+    query,
+    hotel_id: Optional[int] = None,
+    arrival_from: Optional[date] = None,
+    arrival_to: Optional[date] = None,
+    reservation_status: Optional[str] = None,
+    stay_from: Optional[date] = None,
+    stay_to: Optional[date] = None,
+    guest_name_prefix: Optional[str] = None,
+):
+    if hotel_id is not None:
+        query = query.where(Booking.hotel_id == hotel_id)
+    if arrival_from is not None:
+        query = query.where(Booking.arrival_date >= arrival_from)
+    if arrival_to is not None:
+        query = query.where(Booking.arrival_date <= arrival_to)
+    if reservation_status == CONFIRMED:
+        # Inlined rather than bound so that cached generic plans still match
+        # the partial index's predicate
+        query = query.where(
+            Booking.reservation_status == literal_column(f"'{CONFIRMED}'")
+        )
+    elif reservation_status is not None:
+        query = query.where(Booking.reservation_status == reservation_status)
+    # Stays overlapping the nights [stay_from, stay_to)
+    if stay_to is not None:
+        query = query.where(Booking.arrival_date < stay_to)
+    if stay_from is not None:
+        query = query.where(Booking.check_out_date > stay_from)
+    if guest_name_prefix is not None:
+        # lower(guest_name) LIKE 'prefix%' is what the text_pattern_ops
+        # index serves
+        query = query.where(
+            func.lower(Booking.guest_name).startswith(
+                guest_name_prefix.lower(), autoescape=True
+            )
+        )
+    return query
+
+
+def listing_query(
+    limit: int,
+    sort_key: BookingSortKey = "created_at",
+    after: Optional[tuple[date, str]] = None,
+    hotel_id: Optional[int] = None,
+    arrival_from: Optional[date] = None,
+    arrival_to: Optional[date] = None,
+    reservation_status: Optional[str] = None,
+    stay_from: Optional[date] = None,
+    stay_to: Optional[date] = None,
+    guest_name_prefix: Optional[str] = None,
+):
+    """Select one keyset page of ``LISTING_COLUMNS``, plus one look-ahead row."""
+    sort_column = getattr(Booking, sort_key)
+    query = _filter_bookings(
+        select(*LISTING_COLUMNS),
+        hotel_id,
+        arrival_from,
+        arrival_to,
+        reservation_status,
+        stay_from,
+        stay_to,
+        guest_name_prefix,
+    )
+    if after is not None:
+        query = query.where(tuple_(sort_column, Booking.booking_id) > tuple_(*after))
+    # Fetch one extra row to learn whether another page exists
+    return query.order_by(sort_column, Booking.booking_id).limit(limit + 1)
+
+
+async def list_bookings(
+    db: AsyncSession,
+    limit: int,
+    sort_key: BookingSortKey = "created_at",
+    after: Optional[tuple[date, str]] = None,
+    hotel_id: Optional[int] = None,
+    arrival_from: Optional[date] = None,
+    arrival_to: Optional[date] = None,
+    reservation_status: Optional[str] = None,
+    stay_from: Optional[date] = None,
+    stay_to: Optional[date] = None,
+    guest_name_prefix: Optional[str] = None,
+) -> tuple[list, Optional[str]]:
+    """Return one keyset page of bookings and the cursor of the next page.
+
+    Rows are ordered by ``(sort_key, booking_id)`` so paging never skips or
+    repeats a row, and each page costs an index range scan of ``limit`` rows
+    regardless of how deep into the table it is. Bookings come back as
+    lightweight rows of ``LISTING_COLUMNS``, not ORM entities.
+    """
+    query = listing_query(
+        limit,
+        sort_key,
+        after,
+        hotel_id,
+        arrival_from,
+        arrival_to,
+        reservation_status,
+        stay_from,
+        stay_to,
+        guest_name_prefix,
+    )
+    result = await db.execute(query)
+    bookings = list(result.all())
+
+    next_cursor = None
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        last = bookings[-1]
+        next_cursor = encode_cursor(sort_key, getattr(last, sort_key), last.booking_id)
+    return bookings, next_cursor
+
+
+async def stream_bookings(
+    chunk_size: int = 1000,
+    hotel_id: Optional[int] = None,
+    arrival_from: Optional[date] = None,
+    arrival_to: Optional[date] = None,
+    reservation_status: Optional[str] = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield every matching booking row as plain dicts, ``chunk_size`` at a time.
+
+    Rows come from a server-side cursor as Core rows (no ORM identity map),
+    so memory use is bounded by ``chunk_size`` rather than the table size.
+    The generator owns its session because a streaming response outlives the
+    request-scoped one.
+    """
+    query = _filter_bookings(
+        select(Booking.__table__),
+        hotel_id,
+        arrival_from,
+        arrival_to,
+        reservation_status,
+    ).order_by(Booking.booking_id)
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..db.models import BOOKING_ID_BLOCK_SIZE, booking_id_seq
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BOOKING_ID_LENGTH = 7
+BOOKING_ID_SPACE = len(ALPHABET) ** BOOKING_ID_LENGTH
+
+# n -> (n * MULTIPLIER + OFFSET) mod BOOKING_ID_SPACE is a bijection because
+# MULTIPLIER is coprime with 36, so consecutive booking numbers map to
+# distinct, non-sequential IDs.
+MULTIPLIER = 22_250_411_593
+OFFSET = 31_415_926_535
+
+# Booking IDs tried per insert. Allocated IDs never collide with each other,
+# only with the random IDs of bookings made before allocation, so a second
+# attempt almost always succeeds.
+MAX_BOOKING_ID_ATTEMPTS = 5
+
+UNIQUE_VIOLATION = "23505"
+
+
+def encode_booking_id(number: int) -> str:
+    """Map a booking number to its unique 7-character base-36 booking ID."""
+    if not 0 <= number < BOOKING_ID_SPACE:
+        raise ValueError("Booking number space exhausted")
+    value = (number * MULTIPLIER + OFFSET) % BOOKING_ID_SPACE
+    chars = []
+    for _ in range(BOOKING_ID_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "pgcode", None) == UNIQUE_VIOLATION
+
+
+class BookingIdAllocator:
+    """Hands out unique booking IDs from blocks reserved in the database.
+
+    Each worker reserves ``BOOKING_ID_BLOCK_SIZE`` booking numbers with one
+    ``nextval()`` and then allocates from that block in memory, so only one
+    insert in a block pays a sequence round trip. Blocks are never shared
+    between workers, so allocated IDs cannot collide with each other; numbers
+    left in a block when a worker stops are simply skipped. An allocated ID
+    can still match a legacy random ID, which the insert detects and retries
+    with the next one.
+    """
+
+    def __init__(self):
+        self._next: Optional[int] = None
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, db: AsyncSession) -> str:
+        async with self._lock:
+            if self._next is None or self._next >= self._end:
+                start = await db.scalar(select(booking_id_seq.next_value()))
+                self._next, self._end = start, start + BOOKING_ID_BLOCK_SIZE
+            number = self._next
+            self._next += 1
+        return encode_booking_id(number)
+
+
+booking_id_allocator = BookingIdAllocator()
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any
+
+from ..monitoring import (
+    cache_evictions_counter,
+    cache_hits_counter,
+    cache_misses_counter,
+    resource,
+)
+
+
+class AsyncTTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Concurrent misses for the same key are coalesced: only the first caller
+    starts the loader, the others await its result (single-flight). The load
+    runs in its own task, so cancelling any caller, the first included, does
+    not fail the others.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._labels = {
+            "service": resource.attributes.get("service.name", "unknown"),
+            "cache": name,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            cache_evictions_counter.add(1, {**self._labels, "reason": "expired"})
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            cache_evictions_counter.add(1, {**self._labels, "reason": "lru"})
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _load(
+        self,
+        keys: list[Hashable],
+        loader: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+    ) -> dict[Hashable, Any]:
+        try:
+            loaded = await loader(keys)
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+        for key in keys:
+            if key in loaded:
+                self._store(key, loaded[key])
+        return loaded
+
+    async def get_many(
+        self,
+        keys: Iterable[Hashable],
+        loader: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+    ) -> dict[Hashable, Any]:
+        """Return cached values for ``keys``, loading all misses with one call.
+
+        ``loader`` receives the keys nobody is loading yet and returns a
+        mapping for the keys it could resolve. Keys it leaves out are not
+        cached and are absent from the result.
+        """
+        found: dict[Hashable, Any] = {}
+        waiting: dict[Hashable, asyncio.Task] = {}
+        to_load: list[Hashable] = []
+        for key in dict.fromkeys(keys):
+            hit, value = self._lookup(key)
+            if hit:
+                found[key] = value
+            elif key in self._inflight:
+                waiting[key] = self._inflight[key]
+            else:
+                to_load.append(key)
+        if found:
+            cache_hits_counter.add(len(found), self._labels)
+        if waiting or to_load:
+            cache_misses_counter.add(len(waiting) + len(to_load), self._labels)
+
+        if to_load:
+            task = asyncio.ensure_future(self._load(to_load, loader))
+            # Retrieve the exception even when every caller was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            for key in to_load:
+                self._inflight[key] = task
+                waiting[key] = task
+
+        for key, task in waiting.items():
+            # Shielded: a cancelled caller stops waiting but leaves the load
+            # running for everyone else waiting on it
+            loaded = await asyncio.shield(task)
+            if key in loaded:
+                found[key] = loaded[key]
+        return found
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+    ) -> Any:
+        """Single-key form of :meth:`get_many`; returns ``None`` when unresolved."""
+        return (await self.get_many([key], loader)).get(key)
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..db.connection import AsyncSessionLocal, engine
+from ..db.models import Booking
+from .inventory_client import InventoryClient
+
+logger = logging.getLogger(__name__)
+
+# Bookings whose rooms are being returned. A chunk left in this state by a
+# crashed sweep is the checkpoint the next sweep resumes from.
+CHECKING_OUT = "checking-out"
+
+# pg advisory lock key, so only one replica sweeps at a time
+CHECKOUT_SWEEP_LOCK_ID = 0x636B6F7574
+
+_CHUNK_COLUMNS = (
+    Booking.booking_id,
+    Booking.hotel_id,
+    Booking.room_type,
+    Booking.arrival_date,
+    Booking.stay_length,
+)
+
+
+async def _adopt_unrecorded_chunk(db: AsyncSession, chunk_size: int) -> str:
+    """Record a run for a chunk claimed before runs were stored on bookings.
+
+    The run is the digest of the chunk's booking IDs, which is the key that
+    sweep sent, so resending the chunk is still replayed.
+    """
+    result = await db.execute(
+        select(Booking.booking_id)
+        .where(
+            Booking.reservation_status == CHECKING_OUT,
+            Booking.checkout_run.is_(None),
+        )
+        .order_by(Booking.booking_id)
+        .limit(chunk_size)
+    )
+    booking_ids = list(result.scalars())
+    run = hashlib.sha256(",".join(booking_ids).encode()).hexdigest()
+    await db.execute(
+        update(Booking)
+        .where(Booking.booking_id.in_(booking_ids))
+        .values(checkout_run=run)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return run
+
+
+async def _next_chunk(
+    db: AsyncSession, today: date, chunk_size: int
+) -> tuple[str, list]:
+    """Return the unfinished chunk, or claim up to ``chunk_size`` new checkouts.
+
+    Returns the chunk's run ID with its rows.
+    """
+    unfinished = (
+        await db.execute(
+            select(Booking.checkout_run)
+            .where(Booking.reservation_status == CHECKING_OUT)
+            .order_by(Booking.checkout_run.nulls_first())
+            .limit(1)
+        )
+    ).first()
+    if unfinished is not None:
+        run = unfinished.checkout_run
+        if run is None:
+            run = await _adopt_unrecorded_chunk(db, chunk_size)
+        result = await db.execute(
+            select(*_CHUNK_COLUMNS).where(
+                Booking.checkout_run == run,
+                Booking.reservation_status == CHECKING_OUT,
+            )
+        )
+        rows = result.all()
+        logger.info(
+            "Resuming checkout sweep run %s of %s bookings", run, len(rows)
+        )
+        return run, rows
+
+    due = (
+        select(Booking.booking_id)
+        .where(
+            Booking.check_out_date < today,
+            Booking.reservation_status == "confirmed",
+        )
+        .order_by(Booking.booking_id)
+        .limit(chunk_size)
+        .scalar_subquery()
+    )
+    run = uuid.uuid4().hex
+    result = await db.execute(
+        update(Booking)
+        .where(Booking.booking_id.in_(due), Booking.reservation_status == "confirmed")
+        .values(reservation_status=CHECKING_OUT, checkout_run=run)
+        .returning(*_CHUNK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    await db.commit()
+    return run, rows
+
+
+def _room_returns(rows) -> list[dict]:
+    """One negative adjustment per ``(hotel_id, room_type, date)`` of the chunk."""
+    returns: Counter = Counter()
+    for row in rows:
+        for night in range(row.stay_length):
+            night_date = row.arrival_date + timedelta(days=night)
+            returns[(row.hotel_id, row.room_type, night_date)] += 1
+    return [
+        {
+            "hotel_id": hotel_id,
+            "room_type": room_type,
+            "date": str(night_date),
+            "num_rooms": -count,
+        }
+        for (hotel_id, room_type, night_date), count in sorted(returns.items())
+    ]
+
+
+async def sweep_checkouts(
+    inventory: InventoryClient, chunk_size: int, today: Optional[date] = None
+) -> int:
+    """Check out every confirmed booking past its check-out date.
+
+    Each chunk is claimed with one ``UPDATE ... RETURNING`` that moves it to
+    ``checking-out`` and stamps it with a new run ID. Its rooms go back to
+    inventory in a single bulk adjust whose Idempotency-Key is that run ID.
+    After that the chunk is marked ``checked-out``. If the sweep dies
+    mid-chunk, the next run re-sends the bookings stored under the same run,
+    with the same key, and the inventory service replays it instead of
+    returning the rooms twice. Cancels refuse ``checking-out`` bookings, so
+    the chunk cannot change in between.
+
+    Returns the number of bookings checked out.
+    """
+    today = today or date.today()
+    swept = 0
+    async with engine.connect() as lock_conn:
+        locked = await lock_conn.scalar(
+            select(func.pg_try_advisory_lock(CHECKOUT_SWEEP_LOCK_ID))
+        )
+        if not locked:
+            logger.info("Checkout sweep already running elsewhere, skipping")
+            return 0
+        try:
+            while True:
+                async with AsyncSessionLocal() as db:
+                    run, rows = await _next_chunk(db, today, chunk_size)
+                    if not rows:
+                        break
+                    resp = await inventory.bulk_adjust_inventory(
+                        _room_returns(rows),
+                        mode="best_effort",
+                        idempotency_key=f"checkout-{run}",
+                    )
+                    resp.raise_for_status()
+                    missed = resp.json()["applied"].count(False)
+                    if missed:
+                        logger.warning(
+                            "Checkout sweep could not return %s room-nights", missed
+                        )
+                    await db.execute(
+                        update(Booking)
+                        .where(
+                            Booking.checkout_run == run,
+                            Booking.reservation_status == CHECKING_OUT,
+                        )
+                        .values(reservation_status="checked-out")
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                swept += len(rows)
+        finally:
+            await lock_conn.scalar(
+                select(func.pg_advisory_unlock(CHECKOUT_SWEEP_LOCK_ID))
+            )
+    return swept
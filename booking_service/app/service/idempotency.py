@@ -0,0 +1,140 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import func
+
+from ..config import settings
+from ..db.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyError(Exception):
+    """The key cannot be used for this request; ``status_code`` is the HTTP answer."""
+
+    status_code = 409
+
+
+class IdempotencyKeyInUse(IdempotencyError):
+    status_code = 409
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    status_code = 422
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: Any
+
+
+def request_fingerprint(method: str, path: str, body: Any) -> str:
+    """Hash of a request, used to reject a key reused with a different payload."""
+    raw = json.dumps(
+        {"method": method, "path": path, "body": body},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def begin_request(
+    db: AsyncSession, key: str, request_hash: str
+) -> Optional[StoredResponse]:
+    """Claim ``key`` for a new request, or return the response stored for it.
+
+    Returns ``None`` when the caller now owns the key and must execute the
+    request. The claim is a single upsert that only takes over an existing
+    row once it has expired or its owner has held it past the lock timeout,
+    so two concurrent requests with the same key can never both execute.
+    """
+    now = func.now()
+    stmt = insert(IdempotencyKey).values(
+        key=key,
+        request_hash=request_hash,
+        locked_at=now,
+        expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "locked_at": stmt.excluded.locked_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(
+            IdempotencyKey.expires_at <= now,
+            and_(
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.locked_at
+                <= now - timedelta(seconds=settings.idempotency_lock_timeout_seconds),
+            ),
+        ),
+    ).returning(IdempotencyKey.key)
+    claimed = (await db.execute(stmt)).scalar_one_or_none()
+    await db.commit()
+    if claimed is not None:
+        return None
+
+    result = await db.execute(
+        select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response_body,
+        ).where(IdempotencyKey.key == key)
+    )
+    row = result.one_or_none()
+    if row is None or row.status_code is None:
+        raise IdempotencyKeyInUse(
+            "A request with this Idempotency-Key is still being processed"
+        )
+    if row.request_hash != request_hash:
+        raise IdempotencyKeyReused(
+            "Idempotency-Key was already used with a different request"
+        )
+    return StoredResponse(status_code=row.status_code, body=row.response_body)
+
+
+async def save_response(
+    db: AsyncSession, key: str, status_code: int, body: Any
+) -> None:
+    """Record the response for ``key`` in the caller's transaction (no commit)."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def release_request(db: AsyncSession, key: str) -> None:
+    """Drop an unfinished claim so that a retry executes the request again."""
+    await db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    """Delete every expired key and return how many were removed."""
+    result = await db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at <= func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,169 @@
+import logging
+from collections.abc import Iterable
+from typing import Any, Literal
+
+import httpx
+
+from ..config import settings
+from .cache import AsyncTTLCache
+from .idempotency import IDEMPOTENCY_HEADER
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_SERVICE_URL = settings.inventory_service_url
+
+# Hotels are effectively static, so their names are cached in-process and
+# shared by every handler instead of being re-fetched per request.
+hotel_name_cache = AsyncTTLCache(
+    "hotel_name",
+    max_entries=settings.hotel_cache_max_entries,
+    ttl_seconds=settings.hotel_cache_ttl_seconds,
+)
+
+
+def reservation_key(booking_id: str, action: Literal["reserve", "release"]) -> str:
+    """Idempotency-Key of the adjustment that reserves or releases a booking's stay."""
+    return f"booking-{booking_id}-{action}"
+
+
+class InventoryClient:
+    """Client for the inventory service backed by one pooled ``httpx.AsyncClient``.
+
+    The underlying client is opened on application startup and closed on
+    shutdown, so connections (and their TCP/TLS handshakes) are reused across
+    requests instead of being set up per call.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 5.0,
+        connect_timeout: float = 2.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=self.timeout
+            )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("InventoryClient used before start()")
+        return self._client
+
+    async def get_inventory(
+        self,
+        hotel_id: int,
+        params: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        return await self.client.get(
+            f"{self.base_url}/{hotel_id}",
+            params=params,
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+
+    async def adjust_inventory(
+        self,
+        hotel_id: int,
+        payload: dict[str, Any],
+        timeout: float | None = None,
+        idempotency_key: str | None = None,
+    ) -> httpx.Response:
+        """Adjust inventory; with ``idempotency_key`` the call is safe to retry."""
+        headers = {}
+        if idempotency_key is not None:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
+        return await self.client.post(
+            f"{self.base_url}/{hotel_id}/adjust",
+            json=payload,
+            headers=headers,
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+
+    async def bulk_adjust_inventory(
+        self,
+        adjustments: list[dict[str, Any]],
+        mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing",
+        timeout: float | None = None,
+        idempotency_key: str | None = None,
+    ) -> httpx.Response:
+        """Apply many single-night adjustments, across hotels, in one request."""
+        headers = {}
+        if idempotency_key is not None:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
+        return await self.client.post(
+            f"{self.base_url}/bulk_adjust",
+            json={"adjustments": adjustments, "mode": mode},
+            headers=headers,
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+
+    async def fetch_hotel_names(
+        self, hotel_ids: Iterable[int], timeout: float | None = None
+    ) -> dict[int, str]:
+        """Resolve the names of all ``hotel_ids`` with a single bulk request.
+
+        Hotels unknown to the inventory service are left out of the result.
+        """
+        ids = sorted(set(hotel_ids))
+        if not ids:
+            return {}
+        resp = await self.client.post(
+            f"{self.base_url}/hotel_names",
+            json={"hotel_ids": ids},
+            timeout=timeout if timeout is not None else self.timeout,
+        )
+        resp.raise_for_status()
+        return {
+            int(hotel_id): hotel_name
+            for hotel_id, hotel_name in resp.json()["hotel_names"].items()
+        }
+
+    async def get_hotel_names(self, hotel_ids: Iterable[int]) -> dict[int, str]:
+        """Cached form of :meth:`fetch_hotel_names`; only misses hit the network."""
+        return await hotel_name_cache.get_many(hotel_ids, self.fetch_hotel_names)
+
+    async def get_hotel_name(self, hotel_id: int) -> str | None:
+        """Return the cached hotel name, or ``None`` if it cannot be resolved."""
+        try:
+            return (await self.get_hotel_names([hotel_id])).get(hotel_id)
+        except httpx.HTTPError as e:
+            logger.warning("Error fetching hotel name for hotel_id=%s: %s", hotel_id, e)
+            return None
+
+
+inventory_client = InventoryClient(
+    INVENTORY_SERVICE_URL,
+    max_connections=settings.inventory_max_connections,
+    max_keepalive_connections=settings.inventory_max_keepalive_connections,
+    keepalive_expiry=settings.inventory_keepalive_expiry_seconds,
+    http2=settings.inventory_http2,
+    timeout=settings.inventory_timeout_seconds,
+    connect_timeout=settings.inventory_connect_timeout_seconds,
+)
+
+
+def get_inventory_client() -> InventoryClient:
+    return inventory_client
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+import httpx
+from sqlalchemy import delete, exists, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+
+from ..config import settings
+from ..db.connection import AsyncSessionLocal
+from ..db.models import CONFIRMED, PENDING, UNRESERVED, Booking, OutboxEvent
+from ..monitoring import (
+    outbox_delivery_lag_histogram,
+    outbox_events_counter,
+    resource,
+)
+from .inventory_client import InventoryClient, inventory_client, reservation_key
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_adjustment(
+    db: AsyncSession, hotel_id: int, payload: dict[str, Any], idempotency_key: str
+) -> None:
+    """Add an inventory adjustment to the outbox in the caller's transaction.
+
+    The event is only delivered once the caller commits, and is lost if it
+    rolls back, so it always matches the booking change it belongs to.
+    """
+    db.add(
+        OutboxEvent(
+            idempotency_key=idempotency_key, hotel_id=hotel_id, payload=payload
+        )
+    )
+
+
+def _reserved_booking_id(idempotency_key: str) -> Optional[str]:
+    """The booking a reserve event is for, or ``None`` for any other event."""
+    booking_id = idempotency_key.removeprefix("booking-").removesuffix("-reserve")
+    if reservation_key(booking_id, "reserve") != idempotency_key:
+        return None
+    return booking_id
+
+
+class OutboxRelay:
+    """Background worker that delivers ``booking_outbox`` events to inventory.
+
+    Events are claimed in batches with ``FOR UPDATE SKIP LOCKED`` and leased
+    by pushing ``next_attempt_at`` forward, so several replicas can relay
+    concurrently without delivering the same event at the same time, and an
+    event held by a crashed replica becomes due again once its lease ends.
+    Each event is sent with its own Idempotency-Key, so a redelivery after a
+    lost response is replayed by the inventory service rather than applied
+    twice. Transient failures are retried with jittered exponential backoff;
+    rejected events and events out of attempts are marked ``failed``.
+
+    Bookings are created ``pending`` and settled here: a delivered reserve
+    confirms its booking, and a failed one (rejected or out of attempts)
+    marks it ``unreserved`` and drops any release queued for it, so rooms
+    that were never taken are never returned. A booking's release is held
+    back until its reserve has been delivered.
+    """
+
+    def __init__(
+        self,
+        inventory: InventoryClient,
+        *,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 30.0,
+        max_attempts: int = 10,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+    ):
+        self.inventory = inventory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._labels = {"service": resource.attributes.get("service.name", "unknown")}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Wake the relay now instead of at its next poll (call after commit)."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except Exception as e:
+                logger.error("Outbox relay batch failed: %s", e, exc_info=True)
+                claimed = 0
+            # A full batch means more may be due, so go again straight away
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2**attempts)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _claim(self, db: AsyncSession) -> list:
+        reserve = aliased(OutboxEvent)
+        # Still in the outbox means not delivered: pending or failed
+        reserve_undelivered = exists().where(
+            reserve.id != OutboxEvent.id,
+            reserve.idempotency_key
+            == func.replace(OutboxEvent.idempotency_key, "-release", "-reserve"),
+        )
+        due = (
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.status == "pending",
+                OutboxEvent.next_attempt_at <= func.now(),
+                ~reserve_undelivered,
+            )
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due))
+            .values(
+                next_attempt_at=func.now() + timedelta(seconds=self.lease_seconds)
+            )
+            .returning(
+                OutboxEvent.id,
+                OutboxEvent.idempotency_key,
+                OutboxEvent.hotel_id,
+                OutboxEvent.payload,
+                OutboxEvent.attempts,
+                OutboxEvent.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        events = result.all()
+        await db.commit()
+        return events
+
+    async def _deliver(self, event) -> tuple[str, Optional[str]]:
+        """Send one event; return ``(result, error)`` with result delivered/retry/failed."""
+        try:
+            resp = await self.inventory.adjust_inventory(
+                event.hotel_id, event.payload, idempotency_key=event.idempotency_key
+            )
+        except httpx.HTTPError as e:
+            return "retry", f"{type(e).__name__}: {e}"
+        if resp.status_code == 200:
+            return "delivered", None
+        error = f"{resp.status_code}: {resp.text}"
+        # 409 means an earlier delivery of this key is still in flight
+        if resp.status_code == 409 or resp.status_code >= 500:
+            return "retry", error
+        return "failed", error
+
+    async def _unreserve(self, db: AsyncSession, booking_id: str) -> None:
+        """Record that inventory will not reserve ``booking_id``'s stay."""
+        await db.execute(
+            update(Booking)
+            .where(
+                Booking.booking_id == booking_id,
+                # Confirmed covers bookings made before they started pending
+                Booking.reservation_status.in_((PENDING, CONFIRMED)),
+            )
+            .values(reservation_status=UNRESERVED)
+            .execution_options(synchronize_session=False)
+        )
+        # Cancelled before the reserve was rejected: there is nothing to return
+        await db.execute(
+            delete(OutboxEvent)
+            .where(
+                OutboxEvent.idempotency_key
+                == reservation_key(booking_id, "release"),
+                OutboxEvent.status == "pending",
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def drain_once(self) -> int:
+        """Deliver one batch of due events; return how many were claimed."""
+        async with AsyncSessionLocal() as db:
+            events = await self._claim(db)
+            if not events:
+                return 0
+            outcomes = await asyncio.gather(*(self._deliver(e) for e in events))
+
+            delivered = []
+            reserved = []
+            for event, (result, error) in zip(events, outcomes):
+                attempts = event.attempts + 1
+                if result == "retry" and attempts >= self.max_attempts:
+                    result = "failed"
+                outbox_events_counter.add(1, {**self._labels, "result": result})
+                booking_id = _reserved_booking_id(event.idempotency_key)
+                if result == "delivered":
+                    delivered.append(event.id)
+                    if booking_id is not None:
+                        reserved.append(booking_id)
+                    outbox_delivery_lag_histogram.record(
+                        time.time() - event.created_at.timestamp(), self._labels
+                    )
+                    continue
+                logger.warning(
+                    "Outbox event %s not delivered (attempt %s, %s): %s",
+                    event.idempotency_key,
+                    attempts,
+                    result,
+                    error,
+                )
+                values = {"attempts": attempts, "last_error": error}
+                if result == "failed":
+                    values["status"] = "failed"
+                    if booking_id is not None:
+                        await self._unreserve(db, booking_id)
+                else:
+                    values["next_attempt_at"] = func.now() + timedelta(
+                        seconds=self._backoff(attempts)
+                    )
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id == event.id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            if delivered:
+                await db.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered))
+                    .execution_options(synchronize_session=False)
+                )
+            if reserved:
+                # A booking cancelled while pending stays cancelled
+                await db.execute(
+                    update(Booking)
+                    .where(
+                        Booking.booking_id.in_(reserved),
+                        Booking.reservation_status == PENDING,
+                    )
+                    .values(reservation_status=CONFIRMED)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        return len(events)
+
+
+outbox_relay = OutboxRelay(
+    inventory_client,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval_seconds,
+    lease_seconds=settings.outbox_lease_seconds,
+    max_attempts=settings.outbox_max_attempts,
+    backoff_base=settings.outbox_backoff_base_seconds,
+    backoff_max=settings.outbox_backoff_max_seconds,
+)
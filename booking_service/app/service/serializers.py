@@ -0,0 +1,60 @@
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# Response fields read straight off a booking row, in response order.
+# total_price is the DB-computed column, not recomputed here.
+BOOKING_FIELDS = (
+    "booking_id",
+    "arrival_date",
+    "stay_length",
+    "check_out_date",
+    "room_type",
+    "adults",
+    "children",
+    "meal_plan",
+    "market_segment",
+    "is_holiday",
+    "booking_channel",
+    "room_price",
+    "total_price",
+    "reservation_status",
+    "created_at",
+)
+
+_booking_values = attrgetter(*BOOKING_FIELDS)
+
+
+def _encode_default(obj: Any) -> Any:
+    # Numeric columns: strings, as the Booking schema renders Decimal
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class BookingJSONResponse(ORJSONResponse):
+    """orjson-rendered response that also encodes ``Decimal`` values.
+
+    Returning it from a handler skips ``response_model`` validation, so the
+    content must already have the shape of the declared model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def serialize_booking(booking: Any, hotel_name: Optional[str]) -> dict[str, Any]:
+    """Public form of a booking ORM object or row, with the guest name masked."""
+    values = _booking_values(booking)
+    data = {
+        "booking_id": values[0],
+        "guest_name": "[REDACTED]",  # Mask PII
+        "hotel_name": hotel_name,
+    }
+    data.update(zip(BOOKING_FIELDS[1:], values[1:]))
+    return data
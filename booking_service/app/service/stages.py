@@ -0,0 +1,39 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from opentelemetry.trace import Span
+
+from ..db.connection import current_query_stats
+from ..monitoring import booking_stage_duration_histogram, resource, tracer
+
+
+@contextmanager
+def stage(operation: str, name: str) -> Iterator[Span]:
+    """Time one stage of ``operation`` as a child span and a histogram sample.
+
+    The span is named ``{operation}.{name}`` and carries the statements the
+    stage ran against the database, so a slow request's trace shows which
+    hop (inventory call, insert, commit, ...) took the time.
+    """
+    stats = current_query_stats()
+    queries, query_time = (stats.count, stats.duration) if stats else (0, 0.0)
+    start = time.perf_counter()
+    with tracer.start_as_current_span(f"{operation}.{name}") as span:
+        try:
+            yield span
+        finally:
+            booking_stage_duration_histogram.record(
+                time.perf_counter() - start,
+                {
+                    "service": resource.attributes.get("service.name", "unknown"),
+                    "operation": operation,
+                    "stage": name,
+                },
+            )
+            if stats is not None:
+                span.set_attribute("db.query_count", stats.count - queries)
+                span.set_attribute(
+                    "db.query_duration_ms",
+                    round((stats.duration - query_time) * 1000, 3),
+                )
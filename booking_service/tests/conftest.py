@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+# The service reads these at import time, so they are set before any test
+# module imports it. Without TEST_DATABASE_URL the URL is a placeholder: the
+# engine does not connect until it is used, and database tests skip.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql+asyncpg://test@localhost/test"
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+
+@pytest.fixture(scope="session")
+def database_url() -> str:
+    if not TEST_DATABASE_URL:
+        pytest.skip("set TEST_DATABASE_URL to run database tests")
+    return TEST_DATABASE_URL
@@ -0,0 +1,36 @@
+import pytest
+
+from app.service.booking_ids import (
+    ALPHABET,
+    BOOKING_ID_LENGTH,
+    BOOKING_ID_SPACE,
+    encode_booking_id,
+)
+
+
+@pytest.mark.parametrize("number", [0, 1, 12_345, BOOKING_ID_SPACE - 1])
+def test_booking_id_format(number):
+    booking_id = encode_booking_id(number)
+
+    assert len(booking_id) == BOOKING_ID_LENGTH
+    assert set(booking_id) <= set(ALPHABET)
+
+
+def test_consecutive_numbers_get_distinct_scattered_ids():
+    ids = [encode_booking_id(number) for number in range(100_000)]
+
+    assert len(set(ids)) == len(ids)
+    # Not handed out in order, so IDs do not reveal booking volume
+    assert ids != sorted(ids)
+
+
+def test_booking_ids_are_a_bijection_near_the_ends_of_the_space():
+    numbers = [*range(1000), *range(BOOKING_ID_SPACE - 1000, BOOKING_ID_SPACE)]
+
+    assert len({encode_booking_id(number) for number in numbers}) == len(numbers)
+
+
+@pytest.mark.parametrize("number", [-1, BOOKING_ID_SPACE])
+def test_numbers_outside_the_space_are_rejected(number):
+    with pytest.raises(ValueError, match="exhausted"):
+        encode_booking_id(number)
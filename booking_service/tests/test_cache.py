@@ -0,0 +1,159 @@
+import asyncio
+
+from app.service.cache import AsyncTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Resolves every key except ``missing`` to ``key * 2``, once ``release`` is set."""
+
+    def __init__(self, missing=(), blocked=False):
+        self.calls = []
+        self.missing = set(missing)
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        await self.release.wait()
+        return {key: key * 2 for key in keys if key not in self.missing}
+
+
+def test_hits_are_served_without_loading():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        loader = Loader()
+        first = await cache.get_many([1, 2], loader)
+        second = await cache.get_many([2, 1, 3], loader)
+        return first, second, loader.calls
+
+    first, second, calls = asyncio.run(scenario())
+
+    assert first == {1: 2, 2: 4}
+    assert second == {1: 2, 2: 4, 3: 6}
+    assert calls == [[1, 2], [3]]
+
+
+def test_unresolved_keys_are_not_cached():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        loader = Loader(missing={2})
+        found = await cache.get_many([1, 2], loader)
+        return found, await cache.get(2, loader), loader.calls
+
+    found, again, calls = asyncio.run(scenario())
+
+    assert found == {1: 2}
+    assert again is None
+    assert calls == [[1, 2], [2]]
+
+
+def test_entries_expire_after_ttl():
+    async def scenario():
+        clock = FakeClock()
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60, clock=clock)
+        loader = Loader()
+        await cache.get(1, loader)
+        clock.now += 59
+        await cache.get(1, loader)
+        clock.now += 1
+        await cache.get(1, loader)
+        return loader.calls
+
+    assert asyncio.run(scenario()) == [[1], [1]]
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=2, ttl_seconds=60)
+        loader = Loader()
+        await cache.get_many([1, 2], loader)
+        await cache.get(1, loader)
+        await cache.get(3, loader)
+        await cache.get_many([1, 3], loader)
+        await cache.get(2, loader)
+        return len(cache), loader.calls
+
+    size, calls = asyncio.run(scenario())
+
+    assert size == 2
+    assert calls == [[1, 2], [3], [2]]
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        loader = Loader(blocked=True)
+        callers = [
+            asyncio.create_task(cache.get_many(keys, loader))
+            for keys in ([1, 2], [2], [1, 2, 3])
+        ]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await asyncio.gather(*callers), loader.calls
+
+    results, calls = asyncio.run(scenario())
+
+    assert results == [{1: 2, 2: 4}, {2: 4}, {1: 2, 2: 4, 3: 6}]
+    assert calls == [[1, 2], [3]]
+
+
+def test_cancelled_first_caller_does_not_fail_the_others():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        loader = Loader(blocked=True)
+        first = asyncio.create_task(cache.get_many([1, 2], loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get(1, loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+        value = await waiter
+        return first.cancelled(), value, await cache.get(2, loader), loader.calls
+
+    cancelled, value, cached, calls = asyncio.run(scenario())
+
+    assert cancelled
+    assert value == 2
+    # The load finished and was cached, though its first caller was gone
+    assert cached == 4
+    assert calls == [[1, 2]]
+
+
+def test_loader_errors_reach_every_waiter_and_are_not_cached():
+    async def failing(keys):
+        await asyncio.sleep(0)
+        raise RuntimeError("inventory down")
+
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        callers = [asyncio.create_task(cache.get(1, failing)) for _ in range(3)]
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        return results, await cache.get(1, Loader())
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == 2
+
+
+def test_invalidate_forces_a_reload():
+    async def scenario():
+        cache = AsyncTTLCache("test", max_entries=10, ttl_seconds=60)
+        loader = Loader()
+        await cache.get(1, loader)
+        cache.invalidate(1)
+        await cache.get(1, loader)
+        return loader.calls
+
+    assert asyncio.run(scenario()) == [[1], [1]]
+
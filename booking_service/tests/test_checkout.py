@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+from datetime import date
+
+import httpx
+from sqlalchemy import delete, insert, select
+
+HOTEL_ID = 996000
+ARRIVAL = date(2000, 1, 1)
+# Old enough that no real booking is due for checkout on this day
+SWEEP_DAY = date(2000, 1, 10)
+
+
+class StubInventory:
+    """Accepts bulk adjustments, after failing the first ``failures``."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.keys = []
+
+    async def bulk_adjust_inventory(self, adjustments, mode, idempotency_key):
+        self.keys.append(idempotency_key)
+        if self.failures:
+            self.failures -= 1
+            raise httpx.ConnectError("inventory unreachable")
+        return httpx.Response(
+            200,
+            json={"applied": [True] * len(adjustments)},
+            request=httpx.Request("POST", "http://inventory/inventory/bulk_adjust"),
+        )
+
+
+def _booking(booking_id, status, checkout_run=None):
+    return {
+        "booking_id": booking_id,
+        "guest_name": "Checkout Test",
+        "hotel_id": HOTEL_ID,
+        "arrival_date": ARRIVAL,
+        "stay_length": 2,
+        "room_type": "Standard Rooms",
+        "adults": 1,
+        "children": 0,
+        "is_weekend": False,
+        "is_holiday": False,
+        "room_price": 100,
+        "reservation_status": status,
+        "checkout_run": checkout_run,
+    }
+
+
+async def _sweep_scenario(bookings, inventory, sweeps):
+    from app.db.connection import AsyncSessionLocal, create_tables, engine
+    from app.db.models import Booking
+    from app.service.checkout import sweep_checkouts
+
+    scratch = Booking.hotel_id == HOTEL_ID
+    await create_tables()
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Booking).where(scratch))
+        await db.execute(insert(Booking), bookings)
+        await db.commit()
+    try:
+        swept = []
+        for _ in range(sweeps):
+            try:
+                swept.append(await sweep_checkouts(inventory, 10, today=SWEEP_DAY))
+            except httpx.ConnectError:
+                swept.append(None)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Booking.reservation_status, Booking.checkout_run).where(scratch)
+            )
+            rows = result.all()
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Booking).where(scratch))
+            await db.commit()
+        # The engine's connections belong to this test's event loop
+        await engine.dispose()
+    return swept, rows
+
+
+def test_interrupted_sweep_resends_its_chunk_under_the_same_key(database_url):
+    inventory = StubInventory(failures=1)
+    bookings = [_booking(f"ZZCK00{i}", "confirmed") for i in range(3)]
+
+    swept, rows = asyncio.run(_sweep_scenario(bookings, inventory, sweeps=2))
+
+    assert swept == [None, 3]
+    assert len(inventory.keys) == 2
+    assert inventory.keys[0] == inventory.keys[1]
+    assert {status for status, _ in rows} == {"checked-out"}
+    assert {f"checkout-{run}" for _, run in rows} == {inventory.keys[0]}
+
+
+def test_chunk_claimed_before_runs_were_stored_keeps_its_key(database_url):
+    inventory = StubInventory()
+    booking_ids = ["ZZCK010", "ZZCK011"]
+    bookings = [_booking(booking_id, "checking-out") for booking_id in booking_ids]
+    digest = hashlib.sha256(",".join(booking_ids).encode()).hexdigest()
+
+    swept, rows = asyncio.run(_sweep_scenario(bookings, inventory, sweeps=1))
+
+    assert swept == [2]
+    assert inventory.keys == [f"checkout-{digest}"]
+    assert {status for status, _ in rows} == {"checked-out"}
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+
+from app.service import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort_key", ["created_at", "arrival_date"])
+def test_cursor_round_trips(sort_key):
+    cursor = encode_cursor(sort_key, date(2026, 3, 14), "AB12CD3")
+
+    assert decode_cursor(cursor, sort_key) == (date(2026, 3, 14), "AB12CD3")
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    cursor = encode_cursor("arrival_date", date(2026, 3, 14), "ZZZZZZZ")
+
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    cursor = encode_cursor("created_at", date(2026, 3, 14), "AB12CD3")
+
+    with pytest.raises(ValueError, match="different sort order"):
+        decode_cursor(cursor, "arrival_date")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        # {"k":"created_at","id":"AB12CD3"}, without a sort value
+        "eyJrIjoiY3JlYXRlZF9hdCIsImlkIjoiQUIxMkNEMyJ9",
+        # {"k":"created_at","v":"tomorrow","id":"AB12CD3"}
+        "eyJrIjoiY3JlYXRlZF9hdCIsInYiOiJ0b21vcnJvdyIsImlkIjoiQUIxMkNEMyJ9",
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, "created_at")
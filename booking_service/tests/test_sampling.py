@@ -0,0 +1,89 @@
+import logging
+
+import pytest
+
+from app import monitoring
+from app.monitoring import DebugSampler
+from app.sampling import RouteRates
+
+
+@pytest.fixture
+def rates():
+    return RouteRates(
+        0.05,
+        {"GET /": 0.01, "GET /bookings/{booking_id}": 0.2},
+        keep_routes=["POST /bookings/", "GET /bookings/search"],
+    )
+
+
+@pytest.mark.parametrize(
+    "method, path, route",
+    [
+        ("GET", "/", "GET /"),
+        ("GET", "/bookings/AB12CD3", "GET /bookings/{booking_id}"),
+        ("GET", "/bookings/search", "GET /bookings/search"),
+        ("POST", "/bookings/", "POST /bookings/"),
+        ("DELETE", "/bookings/AB12CD3", None),
+        ("GET", "/bookings/AB12CD3/extra", None),
+    ],
+)
+def test_route_for_matches_literal_routes_first(rates, method, path, route):
+    assert rates.route_for(method, path) == route
+
+
+def test_rate_falls_back_to_default(rates):
+    assert rates.rate("GET /") == 0.01
+    assert rates.rate("GET /bookings/{booking_id}") == 0.2
+    assert rates.rate("POST /bookings/") == 0.05
+    assert rates.rate(None) == 0.05
+
+
+def test_keeps_only_keep_routes(rates):
+    assert rates.keeps("POST /bookings/")
+    assert not rates.keeps("GET /")
+    assert not rates.keeps(None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(monitoring.time, "monotonic", clock)
+    return clock
+
+
+def _record(level=logging.DEBUG, lineno=10):
+    return logging.LogRecord("test", level, "app/hot.py", lineno, "msg", None, None)
+
+
+def test_debug_sampler_limits_each_call_site(clock):
+    sampler = DebugSampler(2)
+
+    assert [sampler.filter(_record()) for _ in range(4)] == [True, True, False, False]
+    # Another call site has its own bucket
+    assert sampler.filter(_record(lineno=20))
+    clock.now += 0.5
+    assert sampler.filter(_record())
+    assert not sampler.filter(_record())
+
+
+def test_debug_sampler_passes_records_above_debug(clock):
+    sampler = DebugSampler(1)
+    sampler.filter(_record())
+
+    assert not sampler.filter(_record())
+    assert sampler.filter(_record(level=logging.INFO))
+    assert sampler.filter(_record(level=logging.ERROR))
+
+
+def test_debug_sampler_disabled_by_non_positive_rate(clock):
+    sampler = DebugSampler(0)
+
+    assert all(sampler.filter(_record()) for _ in range(100))
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.models import Base, Booking
+from app.service import listing_query
+
+FIRST_HOTEL_ID = 991000
+HOTELS = 200
+ROWS = 20_000
+FIRST_NAMES = ["Ada", "Bram", "Chen", "Dana", "Emre", "Farah", "Goran", "Hana"]
+LAST_NAMES = ["Okafor", "Lindqvist", "Moreau", "Tanaka", "Silva", "Novak", "Rossi"]
+STATUSES = ["confirmed"] * 2 + ["cancelled", "checked-out"] * 4
+TODAY = date.today()
+WEEK = {"stay_from": TODAY + timedelta(days=30), "stay_to": TODAY + timedelta(days=37)}
+
+# (search filters, index GET /bookings/search must use for them)
+SEARCH_CASES = {
+    "hotel + stay overlap": (
+        {"hotel_id": FIRST_HOTEL_ID + 7, **WEEK},
+        "ix_booking_hotel_id_arrival_date",
+    ),
+    "hotel + stay overlap, confirmed only": (
+        {"hotel_id": FIRST_HOTEL_ID + 7, "reservation_status": "confirmed", **WEEK},
+        "ix_booking_confirmed_hotel_id_arrival_date",
+    ),
+    "guest name prefix + arrival date": (
+        {
+            "guest_name_prefix": "hana tan",
+            "arrival_from": TODAY + timedelta(days=30),
+            "arrival_to": TODAY + timedelta(days=30),
+        },
+        "ix_booking_guest_name_arrival_date",
+    ),
+    "guest name prefix + stay overlap": (
+        {"guest_name_prefix": "Dana Novak 12", **WEEK},
+        "ix_booking_guest_name_arrival_date",
+    ),
+}
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+def _scratch_bookings() -> list[dict]:
+    rng = random.Random(42)
+    return [
+        {
+            "booking_id": f"S{i:06d}",
+            "guest_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "hotel_id": FIRST_HOTEL_ID + i % HOTELS,
+            "arrival_date": TODAY + timedelta(days=rng.randrange(365)),
+            "stay_length": rng.randint(1, 7),
+            "room_type": "Plan Check Rooms",
+            "adults": 2,
+            "children": 0,
+            "is_weekend": False,
+            "is_holiday": False,
+            "room_price": Decimal("100.00"),
+            "reservation_status": rng.choice(STATUSES),
+        }
+        for i in range(ROWS)
+    ]
+
+
+async def _plan_indexes(database_url: str) -> dict[str, set[str]]:
+    """Seed scratch bookings and return the indexes each search plan uses."""
+    engine = create_async_engine(database_url)
+    scratch = Booking.hotel_id.between(FIRST_HOTEL_ID, FIRST_HOTEL_ID + HOTELS - 1)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(delete(Booking).where(scratch))
+            await conn.execute(insert(Booking), _scratch_bookings())
+        async with engine.connect() as conn:
+            await conn.execute(text("ANALYZE booking"))
+            used = {}
+            for case, (filters, _) in SEARCH_CASES.items():
+                # Literal values, as the planner sees them in a custom plan
+                sql = listing_query(100, "arrival_date", **filters).compile(
+                    dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                )
+                plan = await conn.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                used[case] = _index_names(plan[0]["Plan"])
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(Booking).where(scratch))
+        await engine.dispose()
+    return used
+
+
+@pytest.fixture(scope="module")
+def plan_indexes(database_url):
+    return asyncio.run(_plan_indexes(database_url))
+
+
+@pytest.mark.parametrize("case", SEARCH_CASES)
+def test_search_uses_its_index(plan_indexes, case):
+    _, expected = SEARCH_CASES[case]
+
+    assert expected in plan_indexes[case]
@@ -2,13 +2,37 @@ import logging
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.connection import get_db
-from ..schemas import InventoryPublic
-from ..service import adjust_inventory, get_hotel_name_by_id, get_inventory_by_hotel
+from ..db.connection import get_db, get_read_db, remember_write
+from ..schemas import (
+    BulkAdjustRequest,
+    BulkAdjustResponse,
+    HotelAvailability,
+    HotelNamesRequest,
+    HotelNamesResponse,
+    InventoryPublic,
+)
+from ..service import (
+    ADJUST_SUCCESS_RESPONSE,
+    adjust_inventory,
+    adjust_inventory_bulk,
+    get_hotel_name_by_id,
+    get_hotel_names_by_ids,
+    get_inventory_listing,
+    search_availability,
+)
+from ..service.idempotency import (
+    IDEMPOTENCY_HEADER,
+    REPLAYED_HEADER,
+    IdempotencyError,
+    begin_request,
+    release_request,
+    request_fingerprint,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,62 +53,180 @@ async def read_inventory():
     logger.info("Fetching all inventory items")
     return [{"item": "deluxe room", "quantity": 10}, {"item": "suite", "quantity": 5}]
 
+MAX_SEARCH_NIGHTS = 90
+
+# Declared before /{hotel_id} so "availability" is not parsed as a hotel ID
+@router.get("/availability", response_model=List[HotelAvailability])
+async def get_availability(
+    check_in: date = Query(..., description="First night of the stay"),
+    check_out: date = Query(..., description="Departure date (exclusive)"),
+    room_type: Optional[str] = Query(None, max_length=50),
+    location: Optional[str] = Query(None, max_length=100),
+    rooms: int = Query(1, ge=1, description="Rooms needed on every night (party size)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    nights = (check_out - check_in).days
+    if nights < 1:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+    if nights > MAX_SEARCH_NIGHTS:
+        raise HTTPException(
+            status_code=400, detail=f"Stays are limited to {MAX_SEARCH_NIGHTS} nights"
+        )
+    logger.debug(
+        "Searching availability check_in=%s, check_out=%s, room_type=%s, location=%s, rooms=%s",
+        check_in, check_out, room_type, location, rooms,
+    )
+    rows = await search_availability(db, check_in, check_out, room_type, location, rooms)
+    return [{**row._mapping, "nights": nights} for row in rows]
+
 @router.get("/{hotel_id}", response_model=List[InventoryPublic])
 async def get_hotel_inventory(
     hotel_id: int,
     start_date: Optional[date] = Query(None, description="Start date for inventory (inclusive)"),
     end_date: Optional[date] = Query(None, description="End date for inventory (inclusive)"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    logger.debug(f"Fetching inventory for hotel_id={hotel_id}, start_date={start_date}, end_date={end_date}")
-    inventory_list = await get_inventory_by_hotel(db, hotel_id, start_date, end_date)
-    if not inventory_list:
-        logger.warning(f"No inventory found for hotel_id={hotel_id}")
+    logger.debug("Fetching inventory for hotel_id=%s, start_date=%s, end_date=%s", hotel_id, start_date, end_date)
+    response = await get_inventory_listing(db, hotel_id, start_date, end_date)
+    if not response:
+        logger.warning("No inventory found for hotel_id=%s", hotel_id)
         raise HTTPException(status_code=404, detail="Hotel not found or no inventory available")
-    response = []
-    for inv in inventory_list:
-        response.append({
-            "hotel_name": inv.hotel.hotel_name if inv.hotel else None,
-            "location": inv.hotel.location if inv.hotel else None,
-            "room_type": inv.room_type,
-            "date": inv.date,
-            "available_rooms": inv.available_rooms,
-            "room_price": inv.room_price,
-            "demand_level": inv.demand_level,
-        })
-    logger.info(f"Returning {len(response)} inventory items for hotel_id={hotel_id}")
+    logger.info("Returning %s inventory items for hotel_id=%s", len(response), hotel_id)
     return response
 
 @router.get("/hotel_name/{hotel_id}")
-async def get_hotel_name(hotel_id: int, db: AsyncSession = Depends(get_db)):
-    logger.debug(f"Fetching hotel name for hotel_id={hotel_id}")
+async def get_hotel_name(hotel_id: int, db: AsyncSession = Depends(get_read_db)):
+    logger.debug("Fetching hotel name for hotel_id=%s", hotel_id)
     hotel_name = await get_hotel_name_by_id(db, hotel_id)
     if hotel_name is None:
-        logger.error(f"Hotel not found for hotel_id={hotel_id}")
+        logger.error("Hotel not found for hotel_id=%s", hotel_id)
         raise HTTPException(status_code=404, detail="Hotel not found")
     return {"hotel_id": hotel_id, "hotel_name": hotel_name}
 
+@router.post("/hotel_names", response_model=HotelNamesResponse)
+async def get_hotel_names(
+    payload: HotelNamesRequest = Body(...),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Resolve many hotel IDs in one round trip; unknown IDs are omitted."""
+    logger.debug("Fetching hotel names for %s hotel_ids", len(payload.hotel_ids))
+    hotel_names = await get_hotel_names_by_ids(db, payload.hotel_ids)
+    return {"hotel_names": hotel_names}
+
+async def claim_idempotency_key(
+    db: AsyncSession, key: str, path: str, body: dict
+) -> Optional[JSONResponse]:
+    """Claim ``key`` for a POST to ``path``, or build the replay of its stored response."""
+    try:
+        stored = await begin_request(db, key, request_fingerprint("POST", path, body))
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if stored is None:
+        return None
+    return JSONResponse(
+        stored.body, status_code=stored.status_code, headers={REPLAYED_HEADER: "true"}
+    )
+
+@router.post("/bulk_adjust", response_model=BulkAdjustResponse)
+async def bulk_adjust_inventory(
+    response: Response,
+    payload: BulkAdjustRequest = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply many single-night adjustments, across hotels, in one transaction.
+
+    ``applied`` holds one flag per adjustment, in request order. In
+    ``all_or_nothing`` mode any failed adjustment aborts the whole batch
+    with a 400 that lists the failed indexes; in ``best_effort`` mode the
+    nights that are missing or short of rooms are left unchanged.
+    """
+    logger.info(
+        "Bulk adjusting %s inventory nights, mode=%s", len(payload.adjustments), payload.mode
+    )
+    if idempotency_key is not None:
+        replay = await claim_idempotency_key(
+            db, idempotency_key, "/inventory/bulk_adjust", payload.dict()
+        )
+        if replay is not None:
+            logger.info("Replaying stored bulk inventory adjustment")
+            return replay
+    try:
+        applied = await adjust_inventory_bulk(
+            db,
+            payload.adjustments,
+            all_or_nothing=payload.mode == "all_or_nothing",
+            idempotency_key=idempotency_key,
+        )
+    except Exception:
+        if idempotency_key is not None:
+            await db.rollback()
+            await release_request(db, idempotency_key)
+        raise
+    if payload.mode == "all_or_nothing" and not all(applied):
+        if idempotency_key is not None:
+            await release_request(db, idempotency_key)
+        failed = [idx for idx, ok in enumerate(applied) if not ok]
+        logger.warning("Bulk adjustment rolled back, %s adjustments failed", len(failed))
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Not enough available rooms or invalid request.",
+                "failed": failed,
+            },
+        )
+    logger.info("Bulk adjusted %s/%s inventory nights", sum(applied), len(applied))
+    remember_write(response, "/inventory")
+    return {"applied": applied}
+
 class InventoryAdjustRequest(BaseModel):
     room_type: str
     date: date
     num_rooms: int = 1
+    nights: int = Field(1, ge=1, description="Consecutive nights starting at date")
 
 @router.post("/{hotel_id}/adjust")
 async def adjust_inventory_endpoint(
     hotel_id: int,
+    response: Response,
     payload: InventoryAdjustRequest = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: AsyncSession = Depends(get_db),
 ):
-    logger.info(f"Adjusting inventory for hotel_id={hotel_id}, payload={mask_pii(payload.dict())}")
-    success = await adjust_inventory(
-        db,
-        hotel_id=hotel_id,
-        room_type=payload.room_type,
-        date=payload.date,
-        num_rooms=payload.num_rooms,
-    )
+    """Adjust inventory for a stay.
+
+    Retries that repeat an ``Idempotency-Key`` get the stored response back
+    instead of adjusting again.
+    """
+    logger.info("Adjusting inventory for hotel_id=%s, payload=%s", hotel_id, mask_pii(payload.dict()))
+    if idempotency_key is not None:
+        replay = await claim_idempotency_key(
+            db, idempotency_key, f"/inventory/{hotel_id}/adjust", payload.dict()
+        )
+        if replay is not None:
+            logger.info("Replaying stored inventory adjustment for hotel_id=%s", hotel_id)
+            return replay
+    try:
+        success = await adjust_inventory(
+            db,
+            hotel_id=hotel_id,
+            room_type=payload.room_type,
+            date=payload.date,
+            num_rooms=payload.num_rooms,
+            nights=payload.nights,
+            idempotency_key=idempotency_key,
+        )
+    except Exception:
+        if idempotency_key is not None:
+            await db.rollback()
+            await release_request(db, idempotency_key)
+        raise
     if not success:
-        logger.warning(f"Failed to adjust inventory for hotel_id={hotel_id}, payload={mask_pii(payload.dict())}")
+        # Nothing was adjusted, so a retry with the same key may try again
+        if idempotency_key is not None:
+            await release_request(db, idempotency_key)
+        logger.warning("Failed to adjust inventory for hotel_id=%s, payload=%s", hotel_id, mask_pii(payload.dict()))
         raise HTTPException(status_code=400, detail="Not enough available rooms or invalid request.")
-    logger.info(f"Inventory adjusted for hotel_id={hotel_id}, payload={mask_pii(payload.dict())}")
-    return {"success": True, "message": "Inventory adjusted."} 
\ No newline at end of file
+    logger.info("Inventory adjusted for hotel_id=%s, payload=%s", hotel_id, mask_pii(payload.dict()))
+    remember_write(response, f"/inventory/{hotel_id}")
+    return ADJUST_SUCCESS_RESPONSE
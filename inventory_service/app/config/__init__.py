@@ -0,0 +1,69 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime settings, read from environment variables (case-insensitive)."""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Root log level (DEBUG in dev, INFO in prod). DEBUG records are sampled
+    # to this many per second per call site; 0 keeps them all.
+    log_level: str = "INFO"
+    log_debug_rate_per_second: float = 5.0
+    log_queue_size: int = 10000
+
+    # Trace sampling, for OTel and Sentry alike. New traces are kept at
+    # trace_sample_rate, or at their route's rate ("METHOD /route/template").
+    # Requests on trace_keep_routes are also kept whenever they fail (status
+    # 400 or above) or take trace_slow_request_seconds or longer.
+    trace_sample_rate: float = 0.05
+    trace_sample_route_rates: dict[str, float] = {"GET /": 0.01}
+    trace_keep_routes: list[str] = [
+        "POST /inventory/{hotel_id}/adjust",
+        "POST /inventory/bulk_adjust",
+    ]
+    trace_slow_request_seconds: float = 1.0
+    trace_max_pending_traces: int = 1000
+
+    database_url: Optional[str] = None
+    # Seed the sample hotels and inventory on startup (local dev). Deployed
+    # environments run `python -m app.sample_data` as a job instead.
+    seed_sample_inventory: bool = False
+    # Per replica: 3 replicas x (pool_size + max_overflow) share one RDS
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    db_pool_timeout_seconds: float = 10.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache per connection; 0 behind PgBouncer
+    db_statement_cache_size: int = 100
+    db_echo: bool = False
+
+    # Optional read replica for read-only endpoints. Reads fall back to the
+    # primary while replica lag exceeds the threshold, and for a client's own
+    # writes during the read-your-writes window.
+    database_read_url: Optional[str] = None
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 5.0
+    read_your_writes_seconds: float = 10.0
+
+    # "memory" caches per replica, so an adjustment only invalidates the
+    # replica that handled it. It refuses to start when replica_count (set by
+    # the chart) is above 1; use "redis" there so invalidations reach every
+    # reader.
+    availability_cache_backend: Literal["memory", "redis", "none"] = "none"
+    availability_cache_ttl_seconds: float = 30.0
+    availability_cache_max_entries: int = 4096
+    redis_url: Optional[str] = None
+    replica_count: int = 1
+
+    # Stored responses are replayed for this long; a claim on a key whose
+    # request has not finished is released after the lock timeout.
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_lock_timeout_seconds: float = 60.0
+    idempotency_purge_interval_seconds: float = 3600.0
+
+
+settings = Settings()
@@ -1,21 +1,127 @@
-import os
+import asyncio
+import logging
+import math
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
 
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Request, Response
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateIndex
 
-from ..monitoring import db_connection_errors_counter, resource
+from ..config import settings
+from ..monitoring import (
+    db_connection_errors_counter,
+    db_pool_checkout_wait_histogram,
+    db_reads_counter,
+    meter,
+    resource,
+)
 from .models import Base
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = settings.database_url
 
 if not DATABASE_URL:
     db_connection_errors_counter.add(1, {"service": resource.attributes.get("service.name", "unknown")})
     raise ValueError("DATABASE_URL environment variable not set")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait_histogram.record(
+                time.perf_counter() - start,
+                {"service": resource.attributes.get("service.name", "unknown"), "pool": self.logging_name},
+            )
+
+class QueryStats:
+    """Statements run and time spent in the database during one request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+def track_queries() -> QueryStats:
+    """Start counting statements run from the current context (one request)."""
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time
+    conn.info["query_start"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start", None)
+    stats = _query_stats.get()
+    if stats is not None and start is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+_engines: dict[str, AsyncEngine] = {}
+
+def make_engine(database_url: str, name: str = "primary") -> AsyncEngine:
+    """Create an async engine with the pool configured from settings."""
+    connect_args = {}
+    if make_url(database_url).get_driver_name() == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+    engine = create_async_engine(
+        database_url,
+        echo=settings.db_echo,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_logging_name=name,
+        connect_args=connect_args,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    _engines[name] = engine
+    return engine
+
+def _observe_pools(options: CallbackOptions):
+    service = resource.attributes.get("service.name", "unknown")
+    for name, engine in _engines.items():
+        pool = engine.sync_engine.pool
+        labels = {"service": service, "pool": name}
+        yield Observation(pool.checkedout(), {**labels, "state": "in_use"})
+        yield Observation(pool.checkedin(), {**labels, "state": "idle"})
+
+meter.create_observable_gauge(
+    name="db_pool_connections",
+    callbacks=[_observe_pools],
+    description="Database pool connections, labelled by state (in_use, idle)",
+    unit="1"
+)
+
+engine = make_engine(DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
@@ -26,10 +132,200 @@ async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+# pg advisory lock key, so only one replica builds indexes at a time
+INDEX_BUILD_LOCK_ID = 0x696E766978
+
+# Indexes in the current schema, and whether each is usable
+INDEX_VALIDITY_SQL = text("""
+    SELECT c.relname, i.indisvalid
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relnamespace = current_schema()::regnamespace
+""")
+
+# Indexes dropped from the models, removed once their replacements are built
+RETIRED_INDEXES = (
+    # Replaced by ix_inventory_date_room_type_covering, which also includes
+    # hotel_id, so the availability search no longer reads the heap
+    "ix_inventory_date_room_type",
+)
+
+def _create_index_concurrently(index, dialect):
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+    # The model indexes are also created by create_all inside a transaction,
+    # so CONCURRENTLY is added here rather than declared on them
+    return text(re.sub(r"^CREATE (UNIQUE )?INDEX ", r"\g<0>CONCURRENTLY ", ddl))
+
+async def create_missing_indexes() -> list[str]:
+    """Build the model indexes that an existing database lacks.
+
+    ``create_all`` only creates indexes together with a new table, so an
+    index added to the models later never reaches a database whose tables
+    already exist. Each missing index is built with ``CREATE INDEX
+    CONCURRENTLY IF NOT EXISTS``, which does not block writes. An index left
+    invalid by an interrupted build is dropped and built again. An advisory
+    lock keeps replicas from building at the same time; a replica that
+    cannot take it skips the build. Indexes in ``RETIRED_INDEXES`` are
+    dropped after the build. Returns the names of the indexes built.
+    """
+    built = []
+    async with engine.connect() as conn:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await conn.scalar(
+            select(func.pg_try_advisory_lock(INDEX_BUILD_LOCK_ID))
+        )
+        if not locked:
+            logger.info("Index build already running elsewhere, skipping")
+            return built
+        try:
+            valid = dict((await conn.execute(INDEX_VALIDITY_SQL)).all())
+            for table in Base.metadata.sorted_tables:
+                for index in sorted(table.indexes, key=lambda index: index.name):
+                    if valid.get(index.name):
+                        continue
+                    if index.name in valid:
+                        logger.warning("Rebuilding invalid index %s", index.name)
+                        await conn.execute(
+                            text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+                        )
+                    logger.info("Building index %s", index.name)
+                    await conn.execute(_create_index_concurrently(index, conn.dialect))
+                    built.append(index.name)
+            for name in RETIRED_INDEXES:
+                if name in valid:
+                    logger.info("Dropping retired index %s", name)
+                    await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        finally:
+            await conn.scalar(select(func.pg_advisory_unlock(INDEX_BUILD_LOCK_ID)))
+    return built
+
 async def get_db() -> AsyncSession:
     try:
         async with AsyncSessionLocal() as session:
             yield session
     except Exception:
         db_connection_errors_counter.add(1, {"service": resource.attributes.get("service.name", "unknown")})
-        raise 
\ No newline at end of file
+        raise
+
+# Seconds behind the primary; 0 when caught up or not a standby at all, so
+# two independent Postgres instances also work as primary and "replica".
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaLagMonitor:
+    """Polls the replica's replay lag in the background.
+
+    The replica counts as unhealthy until the first successful check, and
+    after any failed one.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_lag: float, interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                self.lag = float(await conn.scalar(REPLICA_LAG_SQL))
+        except Exception as e:
+            logger.warning("Replica lag check failed: %s", e)
+            self.lag = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+ReadSessionLocal = None
+replica_monitor: Optional[ReplicaLagMonitor] = None
+if settings.database_read_url:
+    read_engine = make_engine(settings.database_read_url, name="replica")
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    replica_monitor = ReplicaLagMonitor(
+        read_engine,
+        max_lag=settings.replica_max_lag_seconds,
+        interval=settings.replica_lag_check_interval_seconds,
+    )
+
+    def _observe_replica_lag(options: CallbackOptions):
+        if replica_monitor.lag is not None:
+            yield Observation(replica_monitor.lag, {"service": resource.attributes.get("service.name", "unknown")})
+
+    meter.create_observable_gauge(
+        name="db_replica_lag_seconds",
+        callbacks=[_observe_replica_lag],
+        description="Replication lag of the read replica",
+        unit="s"
+    )
+
+# Set after a client's write; until it expires that client reads the primary
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+def remember_write(response: Response, path: str = "/") -> None:
+    """Send this client's reads under ``path`` to the primary for a while."""
+    if ReadSessionLocal is None:
+        return
+    window = settings.read_your_writes_seconds
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        str(time.time() + window),
+        max_age=math.ceil(window),
+        path=path,
+        httponly=True,
+    )
+
+def _read_target(request: Request) -> tuple[str, str]:
+    if ReadSessionLocal is None:
+        return "primary", "no_replica"
+    try:
+        if float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time():
+            return "primary", "read_your_writes"
+    except ValueError:
+        pass
+    if not replica_monitor.healthy:
+        return "primary", "replica_lag"
+    return "replica", "default"
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Session for read-only endpoints: the replica when it is safe to use."""
+    target, reason = _read_target(request)
+    db_reads_counter.add(1, {
+        "service": resource.attributes.get("service.name", "unknown"),
+        "target": target,
+        "reason": reason,
+    })
+    session_factory = ReadSessionLocal if target == "replica" else AsyncSessionLocal
+    try:
+        async with session_factory() as session:
+            yield session
+    except Exception:
+        db_connection_errors_counter.add(1, {"service": resource.attributes.get("service.name", "unknown")})
+        raise
@@ -1,15 +1,19 @@
 from sqlalchemy import (
+    JSON,
     Column,
     Date,
+    DateTime,
     ForeignKey,
     Identity,
     Index,
     Integer,
     Numeric,
     PrimaryKeyConstraint,
+    SmallInteger,
     String,
 )
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.sql import func
 
 Base = declarative_base()
 
@@ -37,5 +41,34 @@ class Inventory(Base):
 
     __table_args__ = (
         Index("ix_inventory_hotel_id_date", "hotel_id", "date"),
+        # Covers the cross-hotel availability search with an index-only scan:
+        # every Inventory column it reads is a key or included column
+        Index(
+            "ix_inventory_date_room_type_covering",
+            "date",
+            "room_type",
+            postgresql_include=["hotel_id", "available_rooms", "room_price"],
+        ),
         PrimaryKeyConstraint("hotel_id", "room_type", "date"),
-    )
\ No newline at end of file
+    )
+
+
+class IdempotencyKey(Base):
+    """Outcome of a request sent with an ``Idempotency-Key`` header.
+
+    ``status_code`` is NULL while the first request is still executing.
+    Rows are deleted once ``expires_at`` has passed.
+    """
+
+    __tablename__ = "inventory_idempotency_key"
+
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(SmallInteger, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_inventory_idempotency_key_expires_at", "expires_at"),
+    )
@@ -1,13 +1,25 @@
-import time
+import asyncio
+import logging
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
 from .api import inventory
-from .db.connection import AsyncSessionLocal, engine
+from .config import settings
+from .db.connection import (
+    AsyncSessionLocal,
+    create_missing_indexes,
+    engine,
+    replica_monitor,
+    track_queries,
+)
 from .db.models import Base
+from .middleware import MetricsMiddleware
 from .monitoring import request_counter, request_duration_histogram, resource
-from .sample_data import populate_sample_inventory
+from .sample_data import seed_inventory
+from .service.idempotency import purge_expired_keys
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Inventory Service"
@@ -15,33 +27,53 @@ app = FastAPI(
 
 FastAPIInstrumentor.instrument_app(app)
 
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    labels = {
-        "service": resource.attributes.get("service.name", "unknown"),
-        "method": request.method,
-        "path": request.url.path,
-    }
-    start_time = time.time()
-    try:
-        response: Response = await call_next(request)
-        duration = time.time() - start_time
-        request_duration_histogram.record(duration, labels)
-        request_counter.add(1, {**labels, "status_code": str(response.status_code)})
-        return response
-    except Exception:
-        duration = time.time() - start_time
-        request_duration_histogram.record(duration, labels)
-        request_counter.add(1, {**labels, "status_code": "500"})
-        raise
+app.add_middleware(
+    MetricsMiddleware,
+    service=resource.attributes.get("service.name", "unknown"),
+    duration_histogram=request_duration_histogram,
+    request_counter=request_counter,
+    track_queries=track_queries,
+)
 
 @app.on_event("startup")
 async def startup_event():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    # Populate sample data
-    async with AsyncSessionLocal() as session:
-        await populate_sample_inventory(session)
+    # In the background, so a long build on a large table does not hold up startup
+    app.state.index_build_task = asyncio.create_task(build_missing_indexes())
+    if settings.seed_sample_inventory:
+        async with engine.begin() as conn:
+            await seed_inventory(conn)
+    app.state.idempotency_purge_task = asyncio.create_task(purge_idempotency_keys())
+    if replica_monitor is not None:
+        replica_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.index_build_task.cancel()
+    app.state.idempotency_purge_task.cancel()
+    if replica_monitor is not None:
+        await replica_monitor.stop()
+
+async def build_missing_indexes():
+    """Build model indexes missing from tables created before they were added."""
+    try:
+        built = await create_missing_indexes()
+        if built:
+            logger.info("Built indexes: %s", ", ".join(built))
+    except Exception as e:
+        logger.error("Index build failed: %s", e, exc_info=True)
+
+async def purge_idempotency_keys():
+    """Delete expired idempotency keys every purge interval."""
+    while True:
+        await asyncio.sleep(settings.idempotency_purge_interval_seconds)
+        try:
+            async with AsyncSessionLocal() as session:
+                removed = await purge_expired_keys(session)
+            logger.info("Purged %s expired idempotency keys", removed)
+        except Exception as e:
+            logger.warning("Error purging expired idempotency keys: %s", e)
 
 app.include_router(inventory.router)
 
@@ -0,0 +1,97 @@
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+from opentelemetry import trace
+from opentelemetry.metrics import Counter, Histogram
+
+# Methods are a label; anything else is folded so clients cannot mint series
+KNOWN_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request duration and count.
+
+    Requests are labelled by the route template that matched
+    (``/bookings/{booking_id}``), not the raw path, so the number of series
+    is bounded by the number of routes. Label sets are built once per
+    method, route and status and reused. Being plain ASGI, it adds no extra
+    task or body streaming per request the way ``@app.middleware("http")``
+    does, and it times the full response, including streamed bodies.
+
+    When ``track_queries`` is given, it is called at the start of each
+    request. The statement count and time it gathers are set on the
+    request's server span.
+    """
+
+    def __init__(
+        self,
+        app,
+        *,
+        service: str,
+        duration_histogram: Histogram,
+        request_counter: Counter,
+        track_queries: Optional[Callable[[], Any]] = None,
+    ):
+        self.app = app
+        self.service = service
+        self.duration_histogram = duration_histogram
+        self.request_counter = request_counter
+        self.track_queries = track_queries
+        self._labels: dict[tuple[str, str], dict[str, str]] = {}
+        self._status_labels: dict[tuple[str, str, int], dict[str, str]] = {}
+
+    def _route_labels(self, method: str, route: str) -> dict[str, str]:
+        key = (method, route)
+        labels = self._labels.get(key)
+        if labels is None:
+            labels = {"service": self.service, "method": method, "path": route}
+            self._labels[key] = labels
+        return labels
+
+    def _counter_labels(self, method: str, route: str, status: int) -> dict[str, str]:
+        key = (method, route, status)
+        labels = self._status_labels.get(key)
+        if labels is None:
+            labels = {
+                **self._route_labels(method, route),
+                "status_code": str(status),
+            }
+            self._status_labels[key] = labels
+        return labels
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        span = trace.get_current_span()
+        stats = self.track_queries() if self.track_queries is not None else None
+        status = 500
+        start = time.perf_counter_ns()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = (time.perf_counter_ns() - start) / 1e9
+            method = scope["method"]
+            if method not in KNOWN_METHODS:
+                method = "OTHER"
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.duration_histogram.record(duration, self._route_labels(method, route))
+            self.request_counter.add(1, self._counter_labels(method, route, status))
+            if stats is not None:
+                span.set_attribute("db.query_count", stats.count)
+                span.set_attribute(
+                    "db.query_duration_ms", round(stats.duration * 1000, 3)
+                )
@@ -1,13 +1,23 @@
+import atexit
 import logging
 import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 
 import sentry_sdk
 from opentelemetry import _logs, trace
+from opentelemetry import context as otel_context
 from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
-from opentelemetry.metrics import get_meter, set_meter_provider
+from opentelemetry.metrics import (
+    CallbackOptions,
+    Observation,
+    get_meter,
+    set_meter_provider,
+)
 from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
 from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
 from opentelemetry.sdk.metrics import MeterProvider
@@ -19,8 +29,12 @@ from pythonjsonlogger import jsonlogger
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.starlette import StarletteIntegration
 
+from .config import settings
+from .sampling import RouteRates, SentrySampler, TailKeepSpanProcessor, make_sampler
+
 # --- Logging Setup ---
-logging.basicConfig(level=logging.DEBUG)
+# Loggers only put records on a bounded queue; JSON formatting, stdout writes
+# and OTLP export run on a QueueListener thread, off the event loop.
 logger = logging.getLogger(__name__)
 
 class PiiFilter(logging.Filter):
@@ -35,10 +49,6 @@ formatter = jsonlogger.JsonFormatter(
 )
 log_handler.setFormatter(formatter)
 log_handler.addFilter(PiiFilter())
-root_logger = logging.getLogger()
-root_logger.handlers = []
-root_logger.addHandler(log_handler)
-root_logger.setLevel(logging.DEBUG)
 
 class ServiceLogFilter(logging.Filter):
     def filter(self, record):
@@ -51,15 +61,98 @@ class ServiceLogFilter(logging.Filter):
             record.trace_id = None
             record.span_id = None
         return True
-root_logger.addFilter(ServiceLogFilter())
+
+
+class DebugSampler(logging.Filter):
+    """Passes at most ``rate`` DEBUG records per second from each call site.
+
+    Token bucket per ``(pathname, lineno)``, so a chatty hot-path debug line
+    is thinned out without starving the others. Records above DEBUG always
+    pass; a ``rate`` of 0 or less disables sampling.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._buckets: dict[tuple[str, int], tuple[float, float]] = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (max(self.rate, 1.0), now))
+        tokens = min(max(self.rate, 1.0), tokens + (now - last) * self.rate)
+        allowed = tokens >= 1.0
+        self._buckets[key] = (tokens - 1.0 if allowed else tokens, now)
+        return allowed
+
+
+class ContextQueueHandler(QueueHandler):
+    """Queues records unformatted, carrying the caller's OTel context.
+
+    Messages are rendered on the listener thread, so log arguments must not
+    be mutated after the call. A full queue drops the record rather than
+    blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.otel_context = otel_context.get_current()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ContextQueueListener(QueueListener):
+    """Runs handlers under the context each record was logged in, so the OTLP
+    handler still correlates logs with the active span."""
+
+    def handle(self, record):
+        ctx = record.__dict__.pop("otel_context", None)
+        token = otel_context.attach(ctx) if ctx is not None else None
+        try:
+            super().handle(record)
+        finally:
+            if token is not None:
+                otel_context.detach(token)
+
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+queue_handler = ContextQueueHandler(log_queue)
+# Sampling first, so dropped debug records skip the span lookup too
+queue_handler.addFilter(DebugSampler(settings.log_debug_rate_per_second))
+queue_handler.addFilter(ServiceLogFilter())
+root_logger = logging.getLogger()
+root_logger.handlers = [queue_handler]
+root_logger.setLevel(settings.log_level.upper())
 
 # --- Tracing Setup ---
 otlp_endpoint = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'otel-collector.observability.svc.cluster.local:4317')
 resource = Resource(attributes={SERVICE_NAME: 'inventory-service'})
-provider = TracerProvider(resource=resource)
+trace_rates = RouteRates(
+    settings.trace_sample_rate,
+    settings.trace_sample_route_rates,
+    settings.trace_keep_routes,
+)
+provider = TracerProvider(resource=resource, sampler=make_sampler(trace_rates))
 otlp_exporter = OTLPSpanExporter(endpoint=otlp_endpoint, insecure=True)
 span_processor = BatchSpanProcessor(otlp_exporter)
 provider.add_span_processor(span_processor)
+provider.add_span_processor(
+    TailKeepSpanProcessor(
+        span_processor,
+        settings.trace_slow_request_seconds,
+        settings.trace_max_pending_traces,
+    )
+)
 trace.set_tracer_provider(provider)
 
 # --- OpenTelemetry Logging Setup ---
@@ -68,7 +161,11 @@ log_provider = LoggerProvider(resource=resource)
 log_provider.add_log_record_processor(BatchLogRecordProcessor(otlp_log_exporter))
 _logs.set_logger_provider(log_provider)
 otel_handler = LoggingHandler(level=logging.NOTSET, logger_provider=log_provider)
-root_logger.addHandler(otel_handler)
+log_listener = ContextQueueListener(
+    log_queue, log_handler, otel_handler, respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
 LoggingInstrumentor().instrument(set_logging_format=False)
 
 # --- Metrics Setup ---
@@ -93,12 +190,52 @@ db_connection_errors_counter = meter.create_counter(
     description="Total number of DB connection errors",
     unit="1"
 )
+availability_cache_requests_counter = meter.create_counter(
+    name="availability_cache_requests_total",
+    description="Availability cache lookups, labelled by result (hit, miss, error)",
+    unit="1"
+)
+availability_cache_invalidations_counter = meter.create_counter(
+    name="availability_cache_invalidations_total",
+    description="Total number of per-hotel availability cache invalidations",
+    unit="1"
+)
+availability_cache_entry_age_histogram = meter.create_histogram(
+    name="availability_cache_entry_age_seconds",
+    description="Age of availability cache entries when served (staleness)",
+    unit="s"
+)
+db_pool_checkout_wait_histogram = meter.create_histogram(
+    name="db_pool_checkout_wait_seconds",
+    description="Time spent waiting to check a connection out of the DB pool",
+    unit="s"
+)
+db_reads_counter = meter.create_counter(
+    name="db_reads_total",
+    description="Read sessions, labelled by target (primary, replica) and reason",
+    unit="1"
+)
+
+
+def _observe_log_queue(options: CallbackOptions):
+    labels = {"service": resource.attributes.get("service.name", "unknown")}
+    yield Observation(queue_handler.dropped, labels)
+
+
+meter.create_observable_counter(
+    name="log_records_dropped_total",
+    callbacks=[_observe_log_queue],
+    description="Log records dropped because the logging queue was full",
+    unit="1",
+)
 
 # --- Sentry Setup ---
+sentry_sampler = SentrySampler(trace_rates, settings.trace_slow_request_seconds)
 sentry_sdk.init(
     dsn=os.getenv('SENTRY_DSN'),
     send_default_pii=True,
-    traces_sample_rate=1.0,
+    traces_sampler=sentry_sampler.traces_sampler,
+    before_send_transaction=sentry_sampler.before_send_transaction,
     integrations=[
         StarletteIntegration(transaction_style="endpoint"),
         FastApiIntegration(transaction_style="endpoint"),
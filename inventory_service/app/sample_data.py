@@ -1,13 +1,28 @@
+import argparse
+import asyncio
 import random
+import time
 from datetime import date
 from decimal import Decimal
 
-from faker import Faker
-from sqlalchemy import select
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    String,
+    cast,
+    column,
+    func,
+    literal,
+    select,
+    true,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
-from .db.models import Hotel, Inventory
-
-fake = Faker()
+from .config import settings
+from .db.models import Base, Hotel, Inventory
 
 hotel_info = [
     {"hotel_name": "Royal Lancaster", "location": "London", "hotel_id": 111, "room_price": 304},
@@ -25,86 +40,113 @@ room_types = [
 
 demand_levels = ["low", "medium", "high"]
 
-def generate_inventory_data():
-    data = []
-    today = date.today()
-    for hotel in hotel_info:
-        for room_type in room_types:
-            # Assign available rooms based on room type
-            if room_type == "Standard Rooms":
-                available = random.randint(10, 20)
-            elif room_type == "Deluxe Rooms":
-                available = random.randint(5, 10)
-            elif room_type == "Suites":
-                available = random.randint(2, 5)
-            elif room_type == "Penthouse Suites":
-                available = random.randint(1, 2)
-            else:
-                available = random.randint(1, 5)
-            # Random demand level
-            demand = random.choice(demand_levels)
-            # Room price can be varied a bit for each type
-            base_price = hotel["room_price"]
-            if room_type == "Standard Rooms":
-                price = Decimal(base_price)
-            elif room_type == "Deluxe Rooms":
-                price = Decimal(base_price * 1.2)
-            elif room_type == "Suites":
-                price = Decimal(base_price * 1.5)
-            elif room_type == "Penthouse Suites":
-                price = Decimal(base_price * 2)
-            else:
-                price = Decimal(base_price)
-            # Round price to 2 decimal places
-            price = price.quantize(Decimal("0.01"))
-            data.append({
-                "hotel_id": hotel["hotel_id"],
-                "hotel_name": hotel["hotel_name"],
-                "location": hotel["location"],
-                "room_type": room_type,
-                "date": today,
-                "available_rooms": available,
-                "room_price": price,
-                "demand_level": demand
-            })
-    return data
+# Inventory is per night, so bookings can only be taken for seeded dates
+SAMPLE_INVENTORY_DAYS = 365
+
+def room_profile(hotel, room_type):
+    """``(hotel_id, room_type, available_rooms, room_price, demand_level)``.
+
+    Drawn from a generator seeded with the hotel and room type, so every
+    seeding run, and every night it adds, gives a room type the same profile.
+    """
+    rng = random.Random(f"{hotel['hotel_id']}:{room_type}")
+    # Assign available rooms based on room type
+    if room_type == "Standard Rooms":
+        available = rng.randint(10, 20)
+    elif room_type == "Deluxe Rooms":
+        available = rng.randint(5, 10)
+    elif room_type == "Suites":
+        available = rng.randint(2, 5)
+    elif room_type == "Penthouse Suites":
+        available = rng.randint(1, 2)
+    else:
+        available = rng.randint(1, 5)
+    # Random demand level
+    demand = rng.choice(demand_levels)
+    # Room price can be varied a bit for each type
+    base_price = hotel["room_price"]
+    if room_type == "Standard Rooms":
+        price = Decimal(base_price)
+    elif room_type == "Deluxe Rooms":
+        price = Decimal(base_price * 1.2)
+    elif room_type == "Suites":
+        price = Decimal(base_price * 1.5)
+    elif room_type == "Penthouse Suites":
+        price = Decimal(base_price * 2)
+    else:
+        price = Decimal(base_price)
+    # Round price to 2 decimal places
+    price = price.quantize(Decimal("0.01"))
+    return hotel["hotel_id"], room_type, available, price, demand
+
+async def seed_inventory(conn: AsyncConnection, days=SAMPLE_INVENTORY_DAYS, start=None, hotels=hotel_info):
+    """Create ``hotels`` and their inventory for ``days`` nights from ``start``.
+
+    Two statements, whatever the horizon: a multi-row insert of the hotels,
+    and an ``INSERT ... SELECT`` that crosses each room type's profile with
+    the night offsets from ``generate_series``, built in the database. Both
+    skip rows that already exist. A re-run never resets rooms already
+    booked, and a longer horizon only adds the missing nights. Returns the
+    number of inventory rows inserted.
+    """
+    start = start or date.today()
+    await conn.execute(
+        insert(Hotel)
+        .values([
+            {"hotel_id": hotel["hotel_id"], "hotel_name": hotel["hotel_name"], "location": hotel["location"]}
+            for hotel in hotels
+        ])
+        .on_conflict_do_nothing()
+    )
+    profiles = values(
+        column("hotel_id", Integer),
+        column("room_type", String),
+        column("available_rooms", Integer),
+        column("room_price", Numeric(8, 2)),
+        column("demand_level", String),
+        name="profile",
+    ).data([room_profile(hotel, room_type) for hotel in hotels for room_type in room_types])
+    offsets = func.generate_series(0, days - 1).table_valued("day_offset").render_derived()
+    nights = select(
+        profiles.c.hotel_id,
+        profiles.c.room_type,
+        cast(literal(start, Date) + offsets.c.day_offset, Date),
+        profiles.c.available_rooms,
+        profiles.c.room_price,
+        profiles.c.demand_level,
+    ).select_from(profiles.join(offsets, true()))
+    stmt = insert(Inventory).from_select(
+        ["hotel_id", "room_type", "date", "available_rooms", "room_price", "demand_level"],
+        nights,
+    ).on_conflict_do_nothing()
+    result = await conn.execute(stmt)
+    return result.rowcount
 
-async def populate_sample_inventory(session):
-    # Only populate if Inventory table is empty
-    inventory_count = await session.execute(select(Inventory))
-    if inventory_count.scalars().first() is not None:
-        return  # Inventory table is not empty, skip population
+async def run(days):
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            inserted = await seed_inventory(conn, days)
+        elapsed = time.perf_counter() - start
+    finally:
+        await engine.dispose()
+    print(f"Seeded {inserted} inventory rows for {days} nights in {elapsed * 1000:.0f} ms")
 
-    # Insert hotels if not already present
-    for hotel in hotel_info:
-        db_hotel = await session.get(Hotel, hotel["hotel_id"])
-        if not db_hotel:
-            db_hotel = Hotel(
-                hotel_id=hotel["hotel_id"],
-                hotel_name=hotel["hotel_name"],
-                location=hotel["location"]
-            )
-            session.add(db_hotel)
-    await session.commit()
+def main():
+    parser = argparse.ArgumentParser(
+        description="Seed the sample hotels and extend their inventory horizon."
+    )
+    parser.add_argument(
+        "--days", type=int, default=SAMPLE_INVENTORY_DAYS,
+        help=f"nights of inventory from today (default {SAMPLE_INVENTORY_DAYS})"
+    )
+    args = parser.parse_args()
+    if not settings.database_url:
+        parser.error("DATABASE_URL environment variable not set")
+    asyncio.run(run(args.days))
 
-    # Insert inventory
-    data = generate_inventory_data()
-    for item in data:
-        # Check if inventory already exists
-        stmt = select(Inventory).filter_by(
-            hotel_id=item["hotel_id"],
-            room_type=item["room_type"],
-            date=item["date"]
-        )
-        result = await session.execute(stmt)
-        if not result.scalars().first():
-            inventory = Inventory(
-                hotel_id=item["hotel_id"],
-                room_type=item["room_type"],
-                date=item["date"],
-                available_rooms=item["available_rooms"],
-                room_price=item["room_price"],
-                demand_level=item["demand_level"]
-            )
-            session.add(inventory)
-    await session.commit()
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from datetime import date
 from decimal import Decimal
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -34,4 +35,42 @@ class InventoryPublic(BaseModel):
     demand_level: str | None = Field(None, max_length=20)
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class HotelNamesRequest(BaseModel):
+    hotel_ids: set[int] = Field(..., max_length=1000)
+
+
+class HotelNamesResponse(BaseModel):
+    hotel_names: dict[int, str]
+
+
+class HotelAvailability(BaseModel):
+    hotel_id: int
+    hotel_name: str = Field(..., max_length=100)
+    location: str = Field(..., max_length=100)
+    room_type: str = Field(..., max_length=50)
+    nights: int
+    min_available_rooms: int
+    total_price: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class InventoryAdjustment(BaseModel):
+    hotel_id: int
+    room_type: str = Field(..., max_length=50)
+    date: date
+    num_rooms: int
+
+
+class BulkAdjustRequest(BaseModel):
+    adjustments: list[InventoryAdjustment] = Field(..., min_length=1, max_length=10000)
+    # all_or_nothing commits only if every adjustment applies; best_effort
+    # commits whichever adjustments could be applied.
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+class BulkAdjustResponse(BaseModel):
+    applied: list[bool]
@@ -1,12 +1,17 @@
-from datetime import date
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
 
-from sqlalchemy import desc
+from sqlalchemy import ARRAY, Date, Integer, String, column, func, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
+from ..db.connection import AsyncSessionLocal
 from ..db.models import Hotel, Inventory
+from ..schemas import InventoryAdjustment
+from .cache import availability_cache
+from .idempotency import save_response
+
+ADJUST_SUCCESS_RESPONSE = {"success": True, "message": "Inventory adjusted."}
 
 
 async def get_inventory_by_hotel(
@@ -14,10 +19,23 @@ async def get_inventory_by_hotel(
     hotel_id: int,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
-) -> List[Inventory]:
+) -> list:
+    """Public inventory rows of a hotel, as lightweight row tuples.
+
+    Only the listed columns are selected, with the hotel joined in the same
+    statement; no ORM entities are built or tracked.
+    """
     query = (
-        select(Inventory)
-        .options(selectinload(Inventory.hotel))
+        select(
+            Hotel.hotel_name,
+            Hotel.location,
+            Inventory.room_type,
+            Inventory.date,
+            Inventory.available_rooms,
+            Inventory.room_price,
+            Inventory.demand_level,
+        )
+        .join(Hotel, Hotel.hotel_id == Inventory.hotel_id)
         .where(Inventory.hotel_id == hotel_id)
     )
     if start_date:
@@ -25,42 +43,186 @@ async def get_inventory_by_hotel(
     if end_date:
         query = query.where(Inventory.date <= end_date)
     result = await db.execute(query)
-    return list(result.scalars().all())
+    return list(result.all())
+
+async def get_inventory_listing(
+    db: AsyncSession,
+    hotel_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[dict]:
+    """Public inventory rows for a hotel, served read-through from the availability cache.
+
+    ``db`` (possibly a replica session) serves the read only while the cache
+    is off. Cache misses load from the primary: rows read from a lagging
+    replica right after an adjustment would otherwise be stored under the
+    hotel's new version and served for a full TTL.
+    """
+    if not availability_cache.enabled:
+        rows = await get_inventory_by_hotel(db, hotel_id, start_date, end_date)
+        return [dict(row._mapping) for row in rows]
+
+    async def load():
+        async with AsyncSessionLocal() as primary:
+            rows = await get_inventory_by_hotel(primary, hotel_id, start_date, end_date)
+        return [dict(row._mapping) for row in rows]
+
+    return await availability_cache.get_or_load(hotel_id, start_date, end_date, load)
 
 async def adjust_inventory(
     db: AsyncSession,
     hotel_id: int,
     room_type: str,
     date: date,
-    num_rooms: int = 1
+    num_rooms: int = 1,
+    nights: int = 1,
+    idempotency_key: Optional[str] = None
 ) -> bool:
-    # Find the inventory row with the latest date <= requested date
-    query = (
-        select(Inventory)
+    """Take (or, with a negative ``num_rooms``, return) rooms for a stay.
+
+    Every night from ``date`` up to, but excluding, ``date + nights`` is
+    adjusted in one set-based UPDATE. The stay is all-or-nothing: if any
+    night has no inventory row or too few rooms, nothing is changed.
+
+    With an ``idempotency_key`` (already claimed by the caller), the success
+    response is stored in the same transaction as the adjustment, so a
+    committed adjustment is always replayed and never applied twice.
+    """
+    check_out = date + timedelta(days=nights)
+    # Postgres re-checks the available_rooms guard against the latest row
+    # version after waiting on a concurrent writer, so two requests can
+    # never both take the last room.
+    stmt = (
+        update(Inventory)
         .where(
             Inventory.hotel_id == hotel_id,
             Inventory.room_type == room_type,
-            Inventory.date <= date,
+            Inventory.date >= date,
+            Inventory.date < check_out,
             Inventory.available_rooms >= num_rooms
         )
-        .order_by(desc(Inventory.date))
-        .limit(1)
-        .options(selectinload(Inventory.hotel))
+        .values(available_rooms=Inventory.available_rooms - num_rooms)
+        .returning(Inventory.date)
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(query)
-    inventory_row = result.scalars().first()
-    if not inventory_row:
-        return False
-
-    # Decrement available_rooms on the ORM instance
-    current_rooms = getattr(inventory_row, "available_rooms", None)
-    if current_rooms is None:
+    result = await db.execute(stmt)
+    if len(result.all()) != nights:
+        await db.rollback()
         return False
-    setattr(inventory_row, "available_rooms", current_rooms - num_rooms)
+    if idempotency_key is not None:
+        await save_response(db, idempotency_key, 200, ADJUST_SUCCESS_RESPONSE)
     await db.commit()
+    await availability_cache.invalidate_hotel(hotel_id)
     return True
 
+async def adjust_inventory_bulk(
+    db: AsyncSession,
+    adjustments: List[InventoryAdjustment],
+    all_or_nothing: bool = True,
+    idempotency_key: Optional[str] = None
+) -> List[bool]:
+    """Apply many single-night adjustments, across hotels, in one statement.
+
+    Adjustments to the same night are summed first, since an UPDATE can
+    only change a row once. The result says, per adjustment, whether its
+    night could be changed. With ``all_or_nothing`` the transaction is
+    rolled back unless every night could; otherwise the nights that could
+    be changed are committed.
+    """
+    totals: Dict[tuple, int] = {}
+    for adj in adjustments:
+        night = (adj.hotel_id, adj.room_type, adj.date)
+        totals[night] = totals.get(night, 0) + adj.num_rooms
+    nights = list(totals)
+    # One array parameter per column, so the statement binds five parameters
+    # however many nights there are (a VALUES list binds five per night and
+    # runs into the 32767 bind parameter limit)
+    rows = func.unnest(
+        literal(list(range(len(nights))), ARRAY(Integer)),
+        literal([night[0] for night in nights], ARRAY(Integer)),
+        literal([night[1] for night in nights], ARRAY(String)),
+        literal([night[2] for night in nights], ARRAY(Date)),
+        literal([totals[night] for night in nights], ARRAY(Integer)),
+    ).table_valued(
+        column("idx", Integer),
+        column("hotel_id", Integer),
+        column("room_type", String),
+        column("date", Date),
+        column("num_rooms", Integer),
+    ).render_derived(name="adjustment")
+    stmt = (
+        update(Inventory)
+        .where(
+            Inventory.hotel_id == rows.c.hotel_id,
+            Inventory.room_type == rows.c.room_type,
+            Inventory.date == rows.c.date,
+            Inventory.available_rooms >= rows.c.num_rooms
+        )
+        .values(available_rooms=Inventory.available_rooms - rows.c.num_rooms)
+        .returning(rows.c.idx)
+        .execution_options(synchronize_session=False)
+    )
+    changed = {nights[idx] for idx in (await db.execute(stmt)).scalars()}
+    applied = [(adj.hotel_id, adj.room_type, adj.date) in changed for adj in adjustments]
+    if all_or_nothing and len(changed) != len(nights):
+        await db.rollback()
+        return applied
+    if idempotency_key is not None:
+        await save_response(db, idempotency_key, 200, {"applied": applied})
+    await db.commit()
+    for hotel_id in {night[0] for night in changed}:
+        await availability_cache.invalidate_hotel(hotel_id)
+    return applied
+
+async def search_availability(
+    db: AsyncSession,
+    check_in: date,
+    check_out: date,
+    room_type: Optional[str] = None,
+    location: Optional[str] = None,
+    rooms: int = 1
+) -> list:
+    """Hotels/room types with at least ``rooms`` free on every night of the stay.
+
+    Computed in one aggregate query: a (hotel, room type) qualifies when it
+    has an inventory row for every night and its minimum availability over
+    the stay covers the request.
+    """
+    nights = (check_out - check_in).days
+    min_available = func.min(Inventory.available_rooms)
+    total_price = (func.sum(Inventory.room_price) * rooms).label("total_price")
+    query = (
+        select(
+            Inventory.hotel_id,
+            Hotel.hotel_name,
+            Hotel.location,
+            Inventory.room_type,
+            min_available.label("min_available_rooms"),
+            total_price,
+        )
+        .join(Hotel, Hotel.hotel_id == Inventory.hotel_id)
+        .where(Inventory.date >= check_in, Inventory.date < check_out)
+        .group_by(Inventory.hotel_id, Hotel.hotel_name, Hotel.location, Inventory.room_type)
+        .having(min_available >= rooms, func.count() == nights)
+        .order_by(total_price, Inventory.hotel_id, Inventory.room_type)
+    )
+    if room_type:
+        query = query.where(Inventory.room_type == room_type)
+    if location:
+        query = query.where(Hotel.location == location)
+    result = await db.execute(query)
+    return list(result.all())
+
 async def get_hotel_name_by_id(db: AsyncSession, hotel_id: int) -> Optional[str]:
     result = await db.execute(select(Hotel.hotel_name).where(Hotel.hotel_id == hotel_id))
     hotel_name = result.scalar_one_or_none()
     return hotel_name
+
+async def get_hotel_names_by_ids(db: AsyncSession, hotel_ids: Iterable[int]) -> Dict[int, str]:
+    ids = set(hotel_ids)
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(Hotel.hotel_id, Hotel.hotel_name).where(Hotel.hotel_id.in_(ids))
+    )
+    return {hotel_id: hotel_name for hotel_id, hotel_name in result.all()}
@@ -0,0 +1,189 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional, Protocol
+
+from ..config import settings
+from ..monitoring import (
+    availability_cache_entry_age_histogram,
+    availability_cache_invalidations_counter,
+    availability_cache_requests_counter,
+    resource,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[Any]: ...
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None: ...
+
+    async def get_version(self, key: str) -> int: ...
+
+    async def bump_version(self, key: str) -> int: ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL. Entries are not shared between replicas."""
+
+    def __init__(self, max_entries: int, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries[key] = (self._clock() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump_version(self, key: str) -> int:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        return self._versions[key]
+
+
+class RedisCacheBackend:
+    """Backend for any Redis-protocol server, shared by all replicas.
+
+    Pass ``client`` to use an existing ``redis.asyncio``-compatible client
+    (e.g. a local stand-in such as fakeredis); otherwise one is created
+    from ``url``. Requires the optional ``redis`` dependency.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "The redis availability cache backend requires the 'redis' package "
+                    "(install inventory-service[redis])"
+                ) from e
+            if not url:
+                raise ValueError("REDIS_URL must be set for the redis cache backend")
+            client = redis.from_url(url)
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self.client.set(
+            key, json.dumps(value, default=str), px=int(ttl_seconds * 1000)
+        )
+
+    async def get_version(self, key: str) -> int:
+        raw = await self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+    async def bump_version(self, key: str) -> int:
+        return int(await self.client.incr(key))
+
+
+class AvailabilityCache:
+    """Read-through cache of per-hotel inventory listings keyed by date range.
+
+    Every hotel has a version number that is part of each entry's key.
+    Writers bump it after committing, which makes all cached ranges of that
+    hotel unreachable at once. A reader that loaded rows before the commit
+    stores them under the old version, so it can never re-publish stale
+    availability after the write has finished.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._labels = {"service": resource.attributes.get("service.name", "unknown")}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def _version_key(hotel_id: int) -> str:
+        return f"inventory:{hotel_id}:version"
+
+    async def _entry_key(
+        self, hotel_id: int, start_date: Optional[date], end_date: Optional[date]
+    ) -> str:
+        version = await self.backend.get_version(self._version_key(hotel_id))
+        return f"inventory:{hotel_id}:v{version}:{start_date}:{end_date}"
+
+    async def get_or_load(self, hotel_id: int, start_date, end_date, loader):
+        """Return the cached listing or call ``loader()`` and cache its result."""
+        if self.backend is None:
+            return await loader()
+        try:
+            key = await self._entry_key(hotel_id, start_date, end_date)
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Availability cache lookup failed for hotel_id=%s: %s", hotel_id, e)
+            availability_cache_requests_counter.add(1, {**self._labels, "result": "error"})
+            return await loader()
+
+        if cached is not None:
+            availability_cache_requests_counter.add(1, {**self._labels, "result": "hit"})
+            availability_cache_entry_age_histogram.record(
+                time.time() - cached["cached_at"], self._labels
+            )
+            return cached["items"]
+
+        availability_cache_requests_counter.add(1, {**self._labels, "result": "miss"})
+        items = await loader()
+        try:
+            await self.backend.set(
+                key, {"cached_at": time.time(), "items": items}, self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning("Availability cache store failed for hotel_id=%s: %s", hotel_id, e)
+        return items
+
+    async def invalidate_hotel(self, hotel_id: int) -> None:
+        """Drop every cached range for ``hotel_id``; call after the write commits."""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.bump_version(self._version_key(hotel_id))
+            availability_cache_invalidations_counter.add(1, self._labels)
+        except Exception as e:
+            logger.error("Availability cache invalidation failed for hotel_id=%s: %s", hotel_id, e)
+
+
+def create_availability_cache() -> AvailabilityCache:
+    backend: Optional[CacheBackend] = None
+    if settings.availability_cache_backend == "memory":
+        if settings.replica_count > 1:
+            logger.error(
+                "The memory availability cache is per replica and would serve stale "
+                "availability across %s replicas", settings.replica_count
+            )
+            raise ValueError(
+                "AVAILABILITY_CACHE_BACKEND=memory requires REPLICA_COUNT=1; "
+                "use redis or none"
+            )
+        backend = MemoryCacheBackend(settings.availability_cache_max_entries)
+    elif settings.availability_cache_backend == "redis":
+        backend = RedisCacheBackend(settings.redis_url)
+    return AvailabilityCache(backend, settings.availability_cache_ttl_seconds)
+
+
+availability_cache = create_availability_cache()
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Hotel, Inventory
+from app.service import adjust_inventory
+
+HOTEL_ID = 990002
+ROOM_TYPE = "Concurrency Test Rooms"
+ROOMS = 5
+REQUESTS = 40
+
+async def _book_concurrently(database_url: str, nights: int):
+    engine = create_async_engine(database_url, pool_size=REQUESTS, max_overflow=0)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    arrival = date.today() + timedelta(days=1)
+
+    async def cleanup():
+        async with engine.begin() as conn:
+            await conn.execute(delete(Inventory).where(Inventory.hotel_id == HOTEL_ID))
+            await conn.execute(delete(Hotel).where(Hotel.hotel_id == HOTEL_ID))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await cleanup()
+    try:
+        async with Session() as session:
+            session.add(Hotel(hotel_id=HOTEL_ID, hotel_name="Concurrency Test Hotel", location="Nowhere"))
+            await session.flush()
+            session.add_all([
+                Inventory(
+                    hotel_id=HOTEL_ID,
+                    room_type=ROOM_TYPE,
+                    date=arrival + timedelta(days=night),
+                    available_rooms=ROOMS,
+                    room_price=100,
+                )
+                for night in range(nights)
+            ])
+            await session.commit()
+
+        start = asyncio.Event()
+
+        async def book() -> bool:
+            async with Session() as session:
+                await start.wait()
+                return await adjust_inventory(session, HOTEL_ID, ROOM_TYPE, arrival, 1, nights)
+
+        tasks = [asyncio.create_task(book()) for _ in range(REQUESTS)]
+        await asyncio.sleep(0.1)
+        start.set()
+        results = await asyncio.gather(*tasks)
+
+        async with Session() as session:
+            lowest, highest = (await session.execute(
+                select(func.min(Inventory.available_rooms), func.max(Inventory.available_rooms))
+                .where(Inventory.hotel_id == HOTEL_ID)
+            )).one()
+    finally:
+        await cleanup()
+        await engine.dispose()
+    return sum(results), lowest, highest
+
+@pytest.mark.parametrize("nights", [1, 3])
+def test_concurrent_adjustments_never_overbook(database_url, nights):
+    succeeded, lowest, highest = asyncio.run(_book_concurrently(database_url, nights))
+
+    assert lowest >= 0
+    assert succeeded == ROOMS
+    # Every night of a stay is taken together, or not at all
+    assert lowest == highest == 0